@@ -0,0 +1,171 @@
+"""
+Moslashuvchan (adaptive) savol tanlash — savollar statistikasi bo'yicha.
+
+Statistika history.item_stats jadvalida: har urinish yozilganda writer
+thread'i har bir javob berilgan savol qatorini bitta UPSERT bilan
+yangilaydi (O(javoblar soni), tarix qayta hisoblanmaydi). Bu yerda u
+bank hajmidagi NumPy massivlariga o'qiladi va STATS_TTL davomida
+keshda turadi:
+
+  p     — to'g'ri javob ulushi, Laplace bilan: (correct + 1) / (n + 2);
+  disc  — diskriminatsiya: javob (0/1) va urinishning qolgan ulushi
+          orasidagi point-biserial korrelyatsiya;
+  time  — o'rtacha javob vaqti (soniya), ma'lumot bo'lmasa NaN.
+
+Tanlash ikki xil:
+  * profile — qiyinlik toifalari bo'yicha kvota ({"oson": 0.3, ...});
+    toifa ichida sampling.iter_indices (prev og'irligi saqlanadi);
+  * target  — talabaning o'zlashtirishiga mos maqsad p atrofida
+    og'irlikli tanlash (Efraimidis–Spirakis kalitlari, NumPy).
+Ikkalasida ham bir klasterdan (dedup) faqat bitta savol olinadi.
+"""
+import os
+import random
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+import history
+from sampling import PREV_WEIGHT, iter_indices
+
+STATS_TTL = 60          # soniya
+MIN_N = 5               # diskriminatsiya shundan kam urinishda ishonchsiz
+BINS = (("qiyin", 0.0, 0.4), ("o'rta", 0.4, 0.75), ("oson", 0.75, 1.01))
+DEFAULT_PROFILE = {"oson": 0.3, "o'rta": 0.5, "qiyin": 0.2}
+TARGET_WIDTH = 0.15     # maqsad p atrofidagi og'irlik kengligi (sigma)
+TARGET_SUCCESS = 0.7    # talaba uchun kutilgan to'g'ri javob ulushi
+
+
+class ItemStats:
+    """Bitta fan bo'yicha savollar statistikasi (bank indeksi bo'yicha massivlar)."""
+
+    __slots__ = ("n", "correct", "p", "disc", "time", "bins")
+
+    def __init__(self, size, rows=()):
+        n = np.zeros(size)
+        correct = np.zeros(size)
+        sy, sy2, sxy = np.zeros(size), np.zeros(size), np.zeros(size)
+        tn, ts = np.zeros(size), np.zeros(size)
+        for q_idx, *vals in rows:
+            if 0 <= q_idx < size:
+                n[q_idx], correct[q_idx], sy[q_idx], sy2[q_idx], sxy[q_idx], \
+                    tn[q_idx], ts[q_idx] = vals
+        self.n = n
+        self.correct = correct
+        self.p = (correct + 1) / (n + 2)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            px = correct / n
+            my = sy / n
+            cov = sxy / n - px * my
+            var = px * (1 - px) * (sy2 / n - my * my)
+            disc = cov / np.sqrt(var)
+            self.time = ts / tn
+        self.disc = np.where((n >= MIN_N) & np.isfinite(disc), disc, 0.0)
+        self.bins = {name: np.nonzero((self.p >= lo) & (self.p < hi))[0]
+                     for name, lo, hi in BINS}
+
+    def __len__(self):
+        return len(self.n)
+
+
+_lock = threading.Lock()
+_cache = {}     # (db, fan) -> (vaqt, ItemStats)
+
+
+def load_stats(subject, size, db_path=None, ttl=STATS_TTL):
+    """history bazasidan statistika; `ttl` soniya davomida keshdan."""
+    db_path = db_path or history.DB_PATH
+    key = db_path, subject
+    now = time.monotonic()
+    with _lock:
+        hit = _cache.get(key)
+        if hit and now - hit[0] < ttl and len(hit[1]) == size:
+            return hit[1]
+    rows = ()
+    if os.path.exists(db_path):
+        try:
+            conn = sqlite3.connect(db_path, timeout=5)
+            try:
+                rows = conn.execute(
+                    "SELECT q_idx, n, correct, sum_y, sum_y2, sum_xy, time_n, time_sum"
+                    " FROM item_stats WHERE subject = ?", (subject,)).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            rows = ()
+    stats = ItemStats(size, rows)
+    with _lock:
+        _cache[key] = now, stats
+    return stats
+
+
+def mastery_target(accuracy):
+    """
+    Talabaning oxirgi natijasidan maqsad p: kuchli talabaga qiyinroq,
+    kuchsizga osonroq savollar — kutilgan natija ~TARGET_SUCCESS atrofida.
+    """
+    return min(0.9, max(0.2, 0.5 + (TARGET_SUCCESS - accuracy)))
+
+
+def _take(order, n, chosen, used, clusters):
+    for i in order:
+        if len(chosen) >= n:
+            return
+        i = int(i)
+        c = clusters.get(i) if clusters else None
+        if c is not None:
+            if c in used:
+                continue
+            used.add(c)
+        chosen.append(i)
+
+
+def _quotas(profile, n):
+    total = sum(profile.values()) or 1
+    raw = {k: n * w / total for k, w in profile.items()}
+    out = {k: int(v) for k, v in raw.items()}
+    for k in sorted(raw, key=lambda k: raw[k] - out[k], reverse=True)[:n - sum(out.values())]:
+        out[k] += 1
+    return out
+
+
+def draw(stats, n, prev=None, rng=None, profile=None, target=None, clusters=None):
+    """
+    n ta savol indeksi. `target` berilsa — p ≈ target atrofida, aks holda
+    `profile` (default DEFAULT_PROFILE) kvotalari bo'yicha.
+    """
+    rng = rng or random
+    prev = set(prev or ())
+    chosen, used = [], set()
+    n = min(n, len(stats))
+
+    if target is not None:
+        w = np.exp(-((stats.p - target) / TARGET_WIDTH) ** 2)
+        w *= 0.5 + np.clip(stats.disc, 0, 1)
+        if prev:
+            w[np.fromiter((i for i in prev if 0 <= i < len(w)), dtype=np.int64)] *= PREV_WEIGHT
+        gen = np.random.default_rng(rng.getrandbits(64))
+        keys = gen.exponential(size=len(w)) / np.maximum(w, 1e-12)
+        _take(np.argsort(keys, kind="stable"), n, chosen, used, clusters)
+        return chosen
+
+    quotas = _quotas(profile or DEFAULT_PROFILE, n)
+    names = [name for name, _, _ in BINS]
+    for name in names:
+        members = stats.bins.get(name, ())
+        k = quotas.get(name, 0)
+        if not k or not len(members):
+            continue
+        prev_pos = np.nonzero(np.isin(members, list(prev)))[0] if prev else ()
+        order = (members[j] for j in iter_indices(len(members), prev_pos, rng))
+        _take(order, len(chosen) + k, chosen, used, clusters)
+
+    if len(chosen) < n:
+        # Toifada savol yetmadi — qolganini qo'shni toifalardan
+        taken = set(chosen)
+        rest = (i for i in iter_indices(len(stats), prev, rng) if i not in taken)
+        _take(rest, n, chosen, used, clusters)
+    return chosen
+
@@ -0,0 +1,366 @@
+"""
+Yengil HTTP/JSON API — yupqa (thin) mijozlar uchun, Streamlit UI yonida.
+
+Mijoz blokni bir marta oladi, javoblarni o'zida bufer qiladi va ularni
+bir nechta paket (batch) bilan yuboradi — har bir radio bosilishi uchun
+websocket aylanishi va to'liq rerun bo'lmaydi, Wi-Fi uzilsa javoblar
+yo'qolmaydi. Savollar o'sha umumiy bankdan (get_bank), blok —
+exam_pool / prepare_block, baholash — scoring.evaluate_answers (UI'dagi
+evaluate() bilan bir xil), holat — session_store (UI checkpoint'lari
+turgan ombor), natija — history.
+
+    GET  /api/subjects                   fanlar (bank fayllari) ro'yxati
+    POST /api/exams                      {"subject", "n"?, "user"?, "minutes"?, "seed"?}
+    GET  /api/exams/<id>                 blok + saqlangan javoblar (qayta ulanish)
+    POST /api/exams/<id>/answers         {"batch": "...", "answers": {"pos": qiymat}}
+    POST /api/exams/<id>/finish          baholash (takroriy chaqiruv — o'sha natija)
+
+Javoblar paketi idempotent: bir xil `batch` id qayta kelsa, qo'llanmaydi
+(oxirgi BATCH_MEMORY ta id saqlanadi); javoblar esa "pos -> qiymat"
+ko'rinishida, shuning uchun qayta yuborish natijani o'zgartirmaydi.
+multiple_choice javobi — option id (blokdagi "options[].id"),
+calculation — son. Blok seed'dan deterministik (exam.seed_key): omborda
+permutatsiyalar emas, seed_key saqlanadi; "seed" berilsa — o'sha variant
+(bir xil seed'li imtihonlar keshdagi bitta blokni bo'lishadi).
+
+    python api.py [PORT]        (default TEST_API_PORT yoki 8502)
+"""
+import json
+import logging
+import math
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import exam_pool
+import history
+import metrics
+import review
+import session_store
+from catalog import FILE_MAP, subject_info
+from dedup import cluster_map
+from exam import ExamSession, cached_block, generate, materialize_perms, new_seed, seed_key
+from question_bank import get_bank
+from scoring import evaluate_answers
+
+PORT = int(os.environ.get("TEST_API_PORT", "8502"))
+CORS_ORIGIN = os.environ.get("TEST_API_CORS")     # masalan http://lab.local:8501
+GRACE = float(os.environ.get("TEST_API_GRACE", "60"))  # deadline'dan keyin bufer uchun
+DEFAULT_SIZE = 25
+DEFAULT_MINUTES = 30
+MAX_BODY = 1 << 20
+BATCH_MEMORY = 256
+MODE = "API"
+
+_log = logging.getLogger(__name__)
+
+# API orqali yakunlangan urinishlar ham takrorlash jadvalini yangilaydi
+review.install()
+
+# Paketlar bitta jarayon ichida imtihon bo'yicha ketma-ket: qat'iy sonli
+# qulflar (striping) — har id uchun yangi qulf yaratilmaydi, xotira o'smaydi
+LOCK_STRIPES = 64
+_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _exam_lock(eid):
+    return _locks[hash(eid) % LOCK_STRIPES]
+
+
+def _store():
+    store = session_store.get_store()
+    if store is None:
+        raise ApiError(503, "Sessiya ombori o'chirilgan (TEST_SESSION_STORE=none)")
+    return store
+
+
+def bank_files():
+    """API orqali ochiq fanlar — UI bilan bir xil (catalog.FILE_MAP)."""
+    return list(FILE_MAP.values())
+
+
+def _bank(subject):
+    if subject not in bank_files():
+        raise ApiError(404, f"Fan topilmadi: {subject!r}")
+    try:
+        return get_bank(subject)
+    except (OSError, ValueError) as e:
+        raise ApiError(500, f"'{subject}' yuklanmadi: {e}")
+
+
+# ── Holat ───────────────────────────────────────
+
+def _load(eid):
+    if not session_store.valid_sid(eid):
+        raise ApiError(404, "Imtihon topilmadi")
+    sess = session_store.unpack(_store().load(eid))
+    if sess is None or sess.get("mode") != MODE:
+        raise ApiError(404, "Imtihon topilmadi")
+    info = subject_info(sess["subject"])
+    if not info or info["sha256"] != sess.get("bank_sha"):
+        raise ApiError(409, "Savollar banki o'zgargan — imtihonni davom ettirib bo'lmaydi")
+    bank = _bank(sess["subject"])
+    perms = sess["perms"]
+    if perms is None:
+        perms = [None] * len(sess["indices"])
+        materialize_perms(bank, sess["indices"], perms, 0, len(perms), sess.get("seed"))
+    ex = ExamSession(bank, sess["indices"], perms)
+    ex.seed = sess.get("seed")
+    ex.sid = eid
+    ex.bank_sha = sess["bank_sha"]
+    ex.started = True
+    ex.finished = sess["finished"]
+    ex.t_start = sess["t_start"]
+    ex.t_end = sess["t_end"]
+    for pos, val in sess["answers"].items():
+        if 0 <= pos < len(ex):
+            ex.answer(pos, val)
+    ex.answer_times = sess["answer_times"]
+    return ex, sess
+
+
+def _save(ex, sess):
+    sess.update({
+        "indices": ex.indices,
+        "perms": None if ex.seed else ex.perms,
+        "seed": ex.seed,
+        "answers": {i: v for i, v in enumerate(ex.answers) if v not in (None, "")},
+        "answer_times": ex.answer_times,
+        "finished": ex.finished,
+    })
+    _store().save(ex.sid, session_store.pack(sess), ex.t_end + session_store.TTL)
+
+
+def _block(ex):
+    out = []
+    for pos, qi in enumerate(ex.indices):
+        q = ex.bank[qi]
+        item = {"pos": pos, "id": q.get("id", qi), "savol": q["savol"],
+                "type": q.get("type", "multiple_choice")}
+        if item["type"] == "multiple_choice":
+            opts, _ = ex.bank.interned(qi)
+            item["options"] = [{"id": o, "text": opts[o]} for o in (ex.perms[pos] or ())]
+        out.append(item)
+    return out
+
+
+def _status(ex, sess):
+    return {"exam_id": ex.sid, "subject": sess["subject"], "variant": ex.variant, "t_end": ex.t_end,
+            "answered": ex.answered, "total": len(ex), "finished": ex.finished}
+
+
+# ── Amallar ─────────────────────────────────────
+
+def create_exam(body):
+    subject = body.get("subject")
+    bank = _bank(subject)
+    user = body.get("user") or None
+    n = body.get("n", DEFAULT_SIZE)
+    minutes = body.get("minutes", DEFAULT_MINUTES)
+    if n is not None and (isinstance(n, bool) or not isinstance(n, int) or n <= 0):
+        raise ApiError(400, "n musbat butun son yoki null (to'liq test) bo'lishi kerak")
+    if isinstance(minutes, bool) or not isinstance(minutes, (int, float)) or not 1 <= minutes <= 300:
+        raise ApiError(400, "minutes 1..300 oralig'ida bo'lishi kerak")
+    seed = body.get("seed")
+    if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int)
+                             or not 0 <= seed < 10 ** 12):
+        raise ApiError(400, "seed 0..10^12 oralig'idagi butun son bo'lishi kerak")
+    bank_sha = (subject_info(subject) or {}).get("sha256")
+    key = seed_key(subject, bank_sha, seed if seed is not None else new_seed())
+
+    # UI bilan bir xil: belgilangan seed — keshdan; prev bo'lmasa — hovuzdan.
+    # Hovuz faqat UI o'lchamlari uchun: mijoz bergan har yangi n o'z
+    # hovuzini (TARGET ta blok) yaratib, xotirani to'ldirmasligi kerak.
+    prev = history.seen_indices(user, subject) if user and seed is None else set()
+    pooled = n in (DEFAULT_SIZE, None) and not prev and seed is None
+    claimed = exam_pool.claim(bank, subject, n) if pooled else None
+    if claimed is not None:
+        key, block = claimed
+    elif seed is not None:
+        block = cached_block(bank, key, n, cluster_map(subject))
+    else:
+        block = generate(bank, key, n, prev, cluster_map(subject))
+
+    indices, perms = block
+    if None in perms:
+        # To'liq test hovuzi bloklari lazy — API butun blokni birdaniga beradi
+        perms = list(perms)
+        materialize_perms(bank, indices, perms, 0, len(perms), key)
+    ex = ExamSession(bank, indices, perms)
+    ex.seed = key
+    ex.sid = uuid.uuid4().hex
+    ex.bank_sha = bank_sha
+    ex.started = True
+    ex.t_start = time.time()
+    ex.t_end = ex.t_start + minutes * 60
+    sess = {"subject": subject, "mode": MODE, "answer_mode": None, "page_size": None,
+            "bank_sha": ex.bank_sha, "user": user, "t_start": ex.t_start, "t_end": ex.t_end,
+            "started": True, "page": 0, "prev": (), "batches": []}
+    _save(ex, sess)
+    return {**_status(ex, sess), "questions": _block(ex)}
+
+
+def get_exam(eid):
+    ex, sess = _load(eid)
+    return {**_status(ex, sess), "questions": _block(ex),
+            "answers": {str(i): v for i, v in enumerate(ex.answers) if v not in (None, "")}}
+
+
+def _valid_answer(ex, pos, val):
+    q = ex.bank[ex.indices[pos]]
+    if val is None:
+        return True
+    if q.get("type", "multiple_choice") == "multiple_choice":
+        return isinstance(val, int) and not isinstance(val, bool) and val in (ex.perms[pos] or ())
+    return isinstance(val, (int, float)) and not isinstance(val, bool) and math.isfinite(val)
+
+
+def submit_answers(eid, body):
+    batch = body.get("batch")
+    answers = body.get("answers")
+    if not isinstance(batch, str) or not batch or len(batch) > 64:
+        raise ApiError(400, "batch — bo'sh bo'lmagan satr (64 belgigacha)")
+    if not isinstance(answers, dict):
+        raise ApiError(400, "answers — {\"pos\": qiymat} ko'rinishida")
+    with _exam_lock(eid):
+        ex, sess = _load(eid)
+        if batch in sess.get("batches", ()):
+            return {**_status(ex, sess), "applied": 0, "duplicate": True}
+        if ex.finished:
+            raise ApiError(409, "Imtihon yakunlangan")
+        now = time.time()
+        if now > ex.t_end + GRACE:
+            raise ApiError(409, "Vaqt tugagan")
+        parsed = []
+        for k, val in answers.items():
+            if not re.fullmatch(r"\d+", str(k)) or int(k) >= len(ex):
+                raise ApiError(400, f"Noto'g'ri savol o'rni: {k!r}")
+            if not _valid_answer(ex, int(k), val):
+                raise ApiError(400, f"{k}-savol uchun noto'g'ri javob: {val!r}")
+            parsed.append((int(k), val))
+        for pos, val in parsed:
+            ex.answer(pos, val, now)
+        sess["batches"] = (sess.get("batches", []) + [batch])[-BATCH_MEMORY:]
+        _save(ex, sess)
+        return {**_status(ex, sess), "applied": len(parsed), "duplicate": False}
+
+
+def finish_exam(eid):
+    with _exam_lock(eid):
+        ex, sess = _load(eid)
+        score, results = evaluate_answers(ex.questions(), ex.answers, as_ids=True)
+        if not ex.finished:
+            ex.finished = True
+            history.record_attempt(
+                sess.get("user"), sess["subject"], MODE, ex.indices, ex.questions(), results,
+                started_at=ex.t_start, answer_times=ex.answer_times,
+                timed_out=time.time() > ex.t_end, seed=ex.seed)
+            _save(ex, sess)
+        return {**_status(ex, sess), "score": score, "results": results}
+
+
+# ── HTTP ────────────────────────────────────────
+
+_EXAM_RE = re.compile(r"^/api/exams/([0-9a-f]{32})(/answers|/finish)?$")
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "TestAPI/1"
+
+    def _send(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-store")
+        if CORS_ORIGIN:
+            self.send_header("Access-Control-Allow-Origin", CORS_ORIGIN)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY:
+            raise ApiError(413, "So'rov juda katta")
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise ApiError(400, "JSON noto'g'ri")
+        if not isinstance(body, dict):
+            raise ApiError(400, "JSON obyekt kutilgan")
+        return body
+
+    def _dispatch(self, method):
+        path = self.path.split("?", 1)[0]
+        if path == "/api/subjects" and method == "GET":
+            return [{"subject": f, "count": (subject_info(f) or {}).get("count")}
+                    for f in bank_files()]
+        if path == "/api/exams" and method == "POST":
+            return create_exam(self._body())
+        m = _EXAM_RE.match(path)
+        if m:
+            eid, action = m.groups()
+            if action is None and method == "GET":
+                return get_exam(eid)
+            if action == "/answers" and method == "POST":
+                return submit_answers(eid, self._body())
+            if action == "/finish" and method == "POST":
+                return finish_exam(eid)
+        raise ApiError(404, "Topilmadi")
+
+    def _handle(self, method):
+        with metrics.stage("api"):
+            try:
+                self._send(200, self._dispatch(method))
+            except ApiError as e:
+                self._send(e.status, {"error": str(e)})
+            except Exception:
+                _log.exception("api: %s %s", method, self.path)
+                self._send(500, {"error": "Ichki xato"})
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        if CORS_ORIGIN:
+            self.send_header("Access-Control-Allow-Origin", CORS_ORIGIN)
+            self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
+            self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.end_headers()
+
+    def log_message(self, fmt, *args):
+        _log.info("%s - %s", self.address_string(), fmt % args)
+
+
+def serve(port=PORT):
+    server = ThreadingHTTPServer(("", port), Handler)
+    server.daemon_threads = True
+    print(f"API: http://localhost:{port}/api/subjects")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        history.get_writer().flush(5)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 or (len(sys.argv) == 2 and not sys.argv[1].isdigit()):
+        print("Foydalanish: python api.py [PORT]")
+        sys.exit(2)
+    serve(int(sys.argv[1]) if len(sys.argv) == 2 else PORT)
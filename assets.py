@@ -0,0 +1,138 @@
+"""
+Statik resurslar — CSS mavzusi va shriftlar (`static/` papkasi).
+
+Streamlit `static/` ni /app/static/ manzilida beradi
+(.streamlit/config.toml: server.enableStaticServing). Mavzu manbasi —
+static/theme.css; ilova undan yig'ilgan theme.min.css ni ulaydi. Manba
+o'zgarsa, min-fayl avtomatik qayta yig'iladi, URL'dagi ?v= xeshi esa
+brauzer keshini yangilaydi.
+
+    python assets.py build   — theme.min.css ni yig'ish
+    python assets.py fonts   — shriftlarni static/fonts ga yuklash (internet kerak)
+
+Shriftlar (OFL) repoda yo'q: deploy paytida, internetli mashinada
+`python assets.py fonts` bir marta ishga tushiriladi va static/fonts
+offline serverga birga ko'chiriladi (devcontainer buni o'zi bajaradi).
+@font-face qoidalari faqat mavjud fayllar uchun theme.min.css ga
+qo'shiladi; URL'lar unga nisbiy (fonts/...), shuning uchun
+server.baseUrlPath bilan ham ishlaydi. Inline fallback (statik xizmat
+o'chiq) shriftlarsiz — u holda /app/static/fonts baribir berilmaydi.
+"""
+import hashlib
+import os
+import re
+import sys
+import threading
+import urllib.request
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+THEME_SRC = os.path.join(STATIC_DIR, "theme.css")
+THEME_MIN = os.path.join(STATIC_DIR, "theme.min.css")
+FONTS_DIR = os.path.join(STATIC_DIR, "fonts")
+FONTS_URL = "fonts/"    # theme.min.css ga nisbiy
+
+# fayl nomi -> (Google Fonts oilasi, og'irliklar); @font-face shulardan yig'iladi
+FONTS = {
+    "JetBrainsMono": ("JetBrains Mono", (300, 400, 600, 700)),
+    "Rajdhani":      ("Rajdhani", (400, 500, 600, 700)),
+}
+
+_lock = threading.Lock()
+_theme = None   # ((manba mtime_ns, fonts mtime_ns), inline css, versiya)
+
+
+def minify_css(text):
+    text = re.sub(r"/\*.*?\*/", "", text, flags=re.S)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+    text = re.sub(r":\s+", ":", text)
+    return text.replace(";}", "}").strip()
+
+
+def font_faces():
+    """@font-face qoidalari — faqat static/fonts da bor woff2 fayllar uchun."""
+    rules = []
+    for name, (family, weights) in FONTS.items():
+        for w in weights:
+            fname = f"{name}-{w}.woff2"
+            if os.path.exists(os.path.join(FONTS_DIR, fname)):
+                rules.append(
+                    f"@font-face{{font-family:'{family}';font-style:normal;font-weight:{w};"
+                    f"font-display:swap;src:local('{family}'),"
+                    f"url('{FONTS_URL}{fname}') format('woff2')}}")
+    return "".join(rules)
+
+
+def _build():
+    global _theme
+    try:
+        fonts_mtime = os.stat(FONTS_DIR).st_mtime_ns
+    except OSError:
+        fonts_mtime = 0
+    mtime = os.stat(THEME_SRC).st_mtime_ns, fonts_mtime
+    if _theme is not None and _theme[0] == mtime:
+        return _theme
+    with open(THEME_SRC, "r", encoding="utf-8") as f:
+        inline = minify_css(f.read())
+    css = font_faces() + inline
+    try:
+        with open(THEME_MIN, "r", encoding="utf-8") as f:
+            stale = f.read() != css
+    except OSError:
+        stale = True
+    if stale:
+        tmp = f"{THEME_MIN}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(css)
+            os.replace(tmp, THEME_MIN)
+        except OSError:
+            # Faqat o'qish mumkin bo'lgan papka — ilova inline CSS ga o'tadi
+            pass
+    _theme = mtime, inline, hashlib.sha256(css.encode("utf-8")).hexdigest()[:12]
+    return _theme
+
+
+def theme_css():
+    """Minifikatsiya qilingan mavzu matni (inline uchun, @font-face'siz)."""
+    with _lock:
+        return _build()[1]
+
+
+def theme_url():
+    """Sahifaga nisbiy URL (server.baseUrlPath bilan ham ishlaydi)."""
+    with _lock:
+        _, _, version = _build()
+    if not os.path.exists(THEME_MIN):
+        return None
+    return f"app/static/theme.min.css?v={version}"
+
+
+def fetch_fonts():
+    """Google Fonts'dan lotin subset woff2 fayllarini static/fonts ga yuklaydi."""
+    os.makedirs(FONTS_DIR, exist_ok=True)
+    headers = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+                             "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"}
+    for name, (family, weights) in FONTS.items():
+        for w in weights:
+            url = ("https://fonts.googleapis.com/css2?family="
+                   f"{family.replace(' ', '+')}:wght@{w}&display=swap")
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as r:
+                css = r.read().decode("utf-8")
+            m = re.search(r"/\* latin \*/\s*@font-face\s*{[^}]*?url\((\S+?)\)\s*format\('woff2'\)", css)
+            if not m:
+                raise RuntimeError(f"{family} {w}: woff2 manzili topilmadi")
+            out = os.path.join(FONTS_DIR, f"{name}-{w}.woff2")
+            with urllib.request.urlopen(m.group(1)) as r, open(out, "wb") as f:
+                f.write(r.read())
+            print(out)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2 or sys.argv[1] not in ("build", "fonts"):
+        print("Foydalanish: python assets.py build|fonts")
+        sys.exit(2)
+    if sys.argv[1] == "build":
+        print(theme_url() or THEME_MIN)
+    else:
+        fetch_fonts()
@@ -0,0 +1,346 @@
+"""
+Savollar bankini tekshirish va import qilish (JSON yoki JSONL).
+
+Fayl butunlay xotiraga o'qilmaydi: JSON massivi bo'laklab o'qilib,
+yozuvlar birma-bir decode qilinadi (xotira — eng katta bitta yozuv
+hajmida), JSONL esa qatorma-qator. Har bir yozuv prepare_block() /
+evaluate() kutgan sxema bo'yicha tekshiriladi va xatolar qator raqami
+bilan beriladi:
+
+  * savol yo'q yoki bo'sh, type noma'lum;
+  * multiple_choice: variantlar ro'yxat emas / satr emas, javob
+    variantlar orasida yo'q (takroriy variant — ogohlantirish);
+  * calculation: to_g_ri_javob yoki tolerance son emas;
+  * takroriy id (ikkala qator ko'rsatiladi).
+
+Qayta import inkremental: har bir yozuvning kontent xeshi (o'qilgan
+xom matnidan — qayta serializatsiya qilinmaydi) va tekshiruv natijasi
+`.import_state.json` da saqlanadi; xeshi o'zgarmagan yozuvlar qayta
+tekshirilmaydi (takroriy id tekshiruvi har doim to'liq). Barcha
+yozuvlar xeshlari bir xil va NATIJA fayli o'sha importdan beri
+o'zgarmagan bo'lsa, u qayta yozilmaydi.
+
+    python bank_import.py MANBA.jsonl [NATIJA.json] [--force]
+
+NATIJA berilsa va xato bo'lmasa (yoki --force — xatoli yozuvlar
+tashlab yuboriladi), bank ilova o'qiydigan JSON massivi sifatida yoziladi.
+"""
+import hashlib
+import json
+import os
+import sys
+
+STATE_FILE = ".import_state.json"
+CHUNK = 1 << 16
+MAX_ITEM = 16 << 20     # bitta yozuv uchun bufer chegarasi
+
+TYPES = ("multiple_choice", "calculation")
+
+
+class Issue:
+    __slots__ = ("line", "severity", "field", "message")
+
+    def __init__(self, line, severity, field, message):
+        self.line = line
+        self.severity = severity
+        self.field = field
+        self.message = message
+
+    def __str__(self):
+        field = f" [{self.field}]" if self.field else ""
+        return f"{self.line}-qator: {self.severity}{field}: {self.message}"
+
+
+# ── Oqimli o'qish ───────────────────────────────
+
+class _Reader:
+    """Bufer + joriy qator raqami; iste'mol qilingan qism tashlab yuboriladi."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.line = 1
+        self.eof = False
+
+    def more(self):
+        chunk = self.f.read(CHUNK)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def advance(self, end):
+        self.line += self.buf.count("\n", self.pos, end)
+        self.pos = end
+
+    def skip_ws(self):
+        while True:
+            n, buf = len(self.buf), self.buf
+            p = self.pos
+            while p < n and buf[p] in " \t\r\n":
+                p += 1
+            self.advance(p)
+            if p < n or not self.more():
+                return
+
+    def peek(self):
+        self.skip_ws()
+        return self.buf[self.pos] if self.pos < len(self.buf) else ""
+
+
+def _iter_array(f):
+    """JSON massivi: (qator, yozuv, xom matn) yoki (qator, JSONDecodeError, None)."""
+    r = _Reader(f)
+    dec = json.JSONDecoder()
+    if r.peek() != "[":
+        yield r.line, json.JSONDecodeError("'[' kutilgan (savollar ro'yxati)", r.buf, r.pos), None
+        return
+    r.advance(r.pos + 1)
+    if r.peek() == "]":
+        return
+    while True:
+        r.skip_ws()
+        line = r.line
+        while True:
+            try:
+                obj, end = dec.raw_decode(r.buf, r.pos)
+                if end < len(r.buf) or r.eof:
+                    raw = r.buf[r.pos:end]
+                    break
+            except json.JSONDecodeError as e:
+                if r.eof or len(r.buf) - r.pos > MAX_ITEM:
+                    yield line + r.buf.count("\n", r.pos, e.pos), e, None
+                    return
+            if not r.more():
+                continue
+        r.advance(end)
+        yield line, obj, raw
+        sep = r.peek()
+        if sep == ",":
+            r.advance(r.pos + 1)
+        elif sep == "]":
+            return
+        else:
+            yield r.line, json.JSONDecodeError("',' yoki ']' kutilgan", r.buf, r.pos), None
+            return
+
+
+def _iter_lines(f):
+    for n, raw in enumerate(f, 1):
+        if not raw.strip():
+            continue
+        try:
+            yield n, json.loads(raw), raw.strip()
+        except json.JSONDecodeError as e:
+            yield n, e, None
+
+
+def _iter_raw(path):
+    with open(path, "r", encoding="utf-8") as f:
+        yield from (_iter_lines(f) if path.endswith(".jsonl") else _iter_array(f))
+
+
+def iter_records(path):
+    """(qator, yozuv | JSONDecodeError) — format fayl kengaytmasidan."""
+    for line, q, _ in _iter_raw(path):
+        yield line, q
+
+
+# ── Tekshiruv ───────────────────────────────────
+
+def _is_number(v):
+    if isinstance(v, bool):
+        return False
+    try:
+        float(v)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def check_item(q):
+    """Bitta yozuv: [(daraja, maydon, xabar)]. Takroriy id bu yerda emas."""
+    if not isinstance(q, dict):
+        return [("xato", None, "yozuv obyekt (dict) bo'lishi kerak")]
+    out = []
+    savol = q.get("savol")
+    if not isinstance(savol, str) or not savol.strip():
+        out.append(("xato", "savol", "savol matni yo'q yoki bo'sh"))
+    if "id" not in q:
+        out.append(("ogohlantirish", "id", "id yo'q — ilova indeksni ko'rsatadi"))
+    elif isinstance(q["id"], bool) or not isinstance(q["id"], (int, str)):
+        out.append(("xato", "id", "id butun son yoki satr bo'lishi kerak"))
+    q_type = q.get("type", "multiple_choice")
+    if q_type not in TYPES:
+        out.append(("xato", "type", f"noma'lum type: {q_type!r}"))
+    elif q_type == "multiple_choice":
+        opts = q.get("variantlar")
+        if not isinstance(opts, list) or not opts:
+            out.append(("xato", "variantlar", "variantlar bo'sh bo'lmagan ro'yxat bo'lishi kerak"))
+        elif not all(isinstance(v, str) for v in opts):
+            out.append(("xato", "variantlar", "har bir variant satr bo'lishi kerak"))
+        else:
+            if len(set(opts)) != len(opts):
+                out.append(("ogohlantirish", "variantlar", "takroriy variant(lar)"))
+            if len(set(opts)) < 2:
+                out.append(("ogohlantirish", "variantlar", "2 tadan kam variant"))
+            if q.get("javob") not in opts:
+                out.append(("xato", "javob", f"javob variantlar orasida yo'q: {q.get('javob')!r}"))
+    else:
+        if not _is_number(q.get("to_g_ri_javob")):
+            out.append(("xato", "to_g_ri_javob", f"son emas: {q.get('to_g_ri_javob')!r}"))
+        if "tolerance" in q and not _is_number(q["tolerance"]):
+            out.append(("xato", "tolerance", f"son emas: {q['tolerance']!r}"))
+    return out
+
+
+def item_hash(raw):
+    """Yozuvning xom JSON matni bo'yicha xesh (json.dumps'siz)."""
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _state_path(path):
+    return os.path.join(os.path.dirname(os.path.abspath(path)), STATE_FILE)
+
+
+def _load_state(path):
+    try:
+        with open(_state_path(path), "r", encoding="utf-8") as f:
+            state = json.load(f)
+        return state if isinstance(state, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(path, state):
+    p = _state_path(path)
+    tmp = p + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, p)
+    except OSError:
+        pass
+
+
+def validate(path, sink=None):
+    """
+    Faylni oqim bilan tekshiradi. `sink(qator, yozuv, xatosizmi)` — har
+    bir yozuv uchun (import yozuvchisi). Qaytaradi: (issues, stats);
+    stats["digest"] — barcha yozuvlar xeshlari bo'yicha umumiy xesh.
+    """
+    name = os.path.basename(path)
+    state = _load_state(path)
+    entry = state.get(name)
+    if not isinstance(entry, dict) or not isinstance(entry.get("items"), dict):
+        entry = {"items": {}}   # eski format — hammasi qayta tekshiriladi
+    cached = entry["items"]
+    seen, issues = {}, []
+    ids = {}
+    digest = hashlib.blake2b(digest_size=16)
+    stats = {"items": 0, "checked": 0, "reused": 0}
+
+    for line, q, raw in _iter_raw(path):
+        if isinstance(q, json.JSONDecodeError):
+            digest.update(b"!")
+            issues.append(Issue(line, "xato", None, f"JSON sintaksis xatosi: {q.msg}"))
+            if not path.endswith(".jsonl"):
+                break
+            continue
+        stats["items"] += 1
+        h = item_hash(raw)
+        digest.update(h.encode())
+        found = cached.get(h)
+        if found is None:
+            found = check_item(q)
+            stats["checked"] += 1
+        else:
+            stats["reused"] += 1
+        seen[h] = found
+        item_issues = [Issue(line, *x) for x in found]
+
+        if isinstance(q, dict) and isinstance(q.get("id"), (int, str)) and not isinstance(q["id"], bool):
+            # Qator emas, yozuv bo'yicha: bir qatordagi (minified) takrorlar ham
+            first = ids.get(q["id"])
+            if first is None:
+                ids[q["id"]] = line
+            else:
+                item_issues.append(Issue(line, "xato", "id",
+                                         f"takroriy id {q['id']!r} ({first}-qatorda ham)"))
+        issues.extend(item_issues)
+        if sink is not None:
+            sink(line, q, not any(i.severity == "xato" for i in item_issues))
+
+    entry["items"] = seen
+    state[name] = entry
+    _save_state(path, state)
+    stats["removed"] = len(set(cached) - set(seen))
+    stats["digest"] = digest.hexdigest()
+    return issues, stats
+
+
+def import_bank(src, dest, force=False):
+    """
+    src -> dest (JSON massivi, yozuv har qatorda). Xato bo'lsa, dest
+    yozilmaydi (force=True — xatoli yozuvlar tashlab yuboriladi).
+    Yozuvlar o'zgarmagan va dest o'sha importdan beri tegilmagan bo'lsa,
+    qayta yozilmaydi (stats["written"] = 0).
+    Qaytaradi: (issues, stats, yozildimi).
+    """
+    # 1-o'tish: faqat tekshiruv (keshdan) — natija kerakmi, shu yerda aniq
+    issues, stats = validate(src)
+    if any(i.severity == "xato" for i in issues) and not force:
+        return issues, stats, False
+    name, key = os.path.basename(src), os.path.abspath(dest)
+    stamp = [stats["digest"], bool(force)]
+    try:
+        st = os.stat(dest)
+        current = stamp + [st.st_mtime_ns, st.st_size]
+    except OSError:
+        current = None
+    if current is not None and _load_state(src).get(name, {}).get("outputs", {}).get(key) == current:
+        stats["written"] = 0
+        return issues, stats, True
+
+    # 2-o'tish: yozish (barcha yozuvlar tekshiruvi allaqachon keshda)
+    tmp = dest + ".tmp"
+    written = 0
+    with open(tmp, "w", encoding="utf-8") as out:
+        out.write("[")
+
+        def sink(line, q, ok):
+            nonlocal written
+            if ok or not force:
+                out.write(("," if written else "") + "\n" + json.dumps(q, ensure_ascii=False))
+                written += 1
+
+        validate(src, sink)
+        out.write("\n]\n")
+    os.replace(tmp, dest)
+    st = os.stat(dest)
+    state = _load_state(src)
+    state.setdefault(name, {}).setdefault("outputs", {})[key] = \
+        [stats["digest"], bool(force), st.st_mtime_ns, st.st_size]
+    _save_state(src, state)
+    stats["written"] = written
+    return issues, stats, True
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if a != "--force"]
+    if not 1 <= len(args) <= 2:
+        print("Foydalanish: python bank_import.py MANBA.json[l] [NATIJA.json] [--force]")
+        sys.exit(2)
+    if len(args) == 2:
+        issues, stats, ok = import_bank(args[0], args[1], "--force" in sys.argv)
+    else:
+        (issues, stats), ok = validate(args[0]), None
+    for issue in issues:
+        print(f"{args[0]}:{issue}")
+    print(", ".join(f"{k}={v}" for k, v in stats.items()))
+    if ok is not None:
+        print(f"{args[1]} yozildi" if ok else f"{args[1]} yozilmadi — xatolar bor")
+    sys.exit(1 if any(i.severity == "xato" for i in issues) else 0)
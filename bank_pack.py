@@ -0,0 +1,215 @@
+"""
+Savollar bazasining kompilyatsiya qilingan (binary) formati — `.qbank`.
+
+Katta fayldan 25 ta savol tanlash uchun butun JSON'ni parse qilish shart
+emas: fayl mmap qilinadi va faqat so'ralgan yozuvlar decode qilinadi.
+
+Tuzilishi (little-endian):
+    header   : magic "QBNK", version u16, reserved u16, count u32,
+               sha256 (32 bayt) — manba JSON faylining xeshi (catalog uchun)
+    offsets  : (count + 1) x u64 — har bir yozuvning boshlanishi
+    records  : flags u8, [id i64], [type str], [savol str],
+               [variantlar: u16 soni + str...], [javob: i16 indeks yoki str],
+               [extra str — qolgan kalitlar JSON ko'rinishida]
+    str      : u32 uzunlik + UTF-8 baytlar
+
+Qurish:
+    python bank_pack.py Diskret.json [Kiberxavfsizlik.json ...]
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from types import MappingProxyType
+
+from question_bank import freeze
+
+MAGIC = b"QBNK"
+VERSION = 2
+SUFFIX = ".qbank"
+
+_HEADER = struct.Struct("<4sHHI32s")
+_U8 = struct.Struct("<B")
+_U16 = struct.Struct("<H")
+_I16 = struct.Struct("<h")
+_U32 = struct.Struct("<I")
+_I64 = struct.Struct("<q")
+_U64 = struct.Struct("<Q")
+
+F_ID = 1
+F_TYPE = 2
+F_SAVOL = 4
+F_VARIANTS = 8
+F_JAVOB = 16
+F_JAVOB_IDX = 32
+F_EXTRA = 64
+
+_KNOWN = ("id", "type", "savol", "variantlar", "javob")
+
+
+def packed_path(json_path):
+    return os.path.splitext(json_path)[0] + SUFFIX
+
+
+def _str(s):
+    b = s.encode("utf-8")
+    return _U32.pack(len(b)) + b
+
+
+def _encode(q):
+    flags, parts = 0, []
+    qid = q.get("id")
+    if isinstance(qid, int) and not isinstance(qid, bool):
+        flags |= F_ID
+        parts.append(_I64.pack(qid))
+    if isinstance(q.get("type"), str):
+        flags |= F_TYPE
+        parts.append(_str(q["type"]))
+    if isinstance(q.get("savol"), str):
+        flags |= F_SAVOL
+        parts.append(_str(q["savol"]))
+
+    variants = q.get("variantlar")
+    if isinstance(variants, list) and all(isinstance(v, str) for v in variants):
+        flags |= F_VARIANTS
+        parts.append(_U16.pack(len(variants)))
+        parts.extend(_str(v) for v in variants)
+    else:
+        variants = None
+
+    javob = q.get("javob")
+    if isinstance(javob, str):
+        flags |= F_JAVOB
+        if variants is not None and javob in variants:
+            flags |= F_JAVOB_IDX
+            parts.append(_I16.pack(variants.index(javob)))
+        else:
+            parts.append(_str(javob))
+
+    # Formatda alohida maydoni yo'q kalitlar (tolerance, to_g_ri_javob, ...)
+    extra = {k: v for k, v in q.items() if k not in _KNOWN}
+    for k, bit in (("id", F_ID), ("type", F_TYPE), ("savol", F_SAVOL),
+                   ("variantlar", F_VARIANTS), ("javob", F_JAVOB)):
+        if k in q and not flags & bit:
+            extra[k] = q[k]
+    if extra:
+        flags |= F_EXTRA
+        parts.append(_str(json.dumps(extra, ensure_ascii=False)))
+
+    return _U8.pack(flags) + b"".join(parts)
+
+
+def compile_bank(json_path, out_path=None):
+    """JSON faylni `.qbank` ga kompilyatsiya qiladi; chiqish yo'lini qaytaradi."""
+    out_path = out_path or packed_path(json_path)
+    with open(json_path, "rb") as f:
+        raw = f.read()
+    data = json.loads(raw.decode("utf-8"))
+    if not isinstance(data, list):
+        raise ValueError(f"{json_path}: savollar ro'yxati (list) kutilgan")
+
+    records = [_encode(q) for q in data]
+    base = _HEADER.size + _U64.size * (len(records) + 1)
+    offsets, pos = [], base
+    for r in records:
+        offsets.append(pos)
+        pos += len(r)
+    offsets.append(pos)
+
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, 0, len(records), hashlib.sha256(raw).digest()))
+        f.write(b"".join(_U64.pack(o) for o in offsets))
+        f.writelines(records)
+    os.replace(tmp, out_path)
+    return out_path
+
+
+class PackedBank:
+    """
+    mmap qilingan `.qbank` — ketma-ketlik (sequence) kabi ishlaydi:
+    len(), [i], iteratsiya. Yozuv faqat birinchi murojaatda decode qilinadi.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, _, count, sha = _HEADER.unpack_from(self._mm, 0)
+        except struct.error:
+            magic = version = None
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"{path}: .qbank formati emas (yoki eski versiya)")
+        self._count = count
+        self.sha256 = sha.hex()     # manba JSON'niki — JSON yo'q bo'lsa ham bir xil
+        self._decoded = {}
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return tuple(self[j] for j in range(*i.indices(self._count)))
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        q = self._decoded.get(i)
+        if q is None:
+            q = self._decoded[i] = self._decode(i)
+        return q
+
+    def _read_str(self, pos):
+        n = _U32.unpack_from(self._mm, pos)[0]
+        pos += _U32.size
+        return self._mm[pos:pos + n].decode("utf-8"), pos + n
+
+    def _decode(self, i):
+        mm = self._mm
+        pos = _U64.unpack_from(mm, _HEADER.size + i * _U64.size)[0]
+        flags = mm[pos]
+        pos += 1
+        q = {}
+        if flags & F_ID:
+            q["id"] = _I64.unpack_from(mm, pos)[0]
+            pos += _I64.size
+        if flags & F_TYPE:
+            q["type"], pos = self._read_str(pos)
+        if flags & F_SAVOL:
+            q["savol"], pos = self._read_str(pos)
+        variants = None
+        if flags & F_VARIANTS:
+            n = _U16.unpack_from(mm, pos)[0]
+            pos += _U16.size
+            variants = []
+            for _ in range(n):
+                v, pos = self._read_str(pos)
+                variants.append(v)
+            q["variantlar"] = tuple(variants)
+        if flags & F_JAVOB:
+            if flags & F_JAVOB_IDX:
+                q["javob"] = variants[_I16.unpack_from(mm, pos)[0]]
+                pos += _I16.size
+            else:
+                q["javob"], pos = self._read_str(pos)
+        if flags & F_EXTRA:
+            extra, pos = self._read_str(pos)
+            q.update((k, freeze(v)) for k, v in json.loads(extra).items())
+        return MappingProxyType(q)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Foydalanish: python bank_pack.py FAYL.json [FAYL.json ...]")
+        sys.exit(2)
+    for src in sys.argv[1:]:
+        out = compile_bank(src)
+        print(f"{src} -> {out} ({os.path.getsize(out)} bayt)")
@@ -0,0 +1,146 @@
+"""
+Asosiy funksiyalar uchun mikro-benchmarklar:
+load_questions (keshdan / sovuq), pick_questions, prepare_block, evaluate.
+
+    python benchmarks/bench_core.py [--repeat 5] [FAYL.json ...]
+
+Natija — bitta chaqiruv uchun eng yaxshi vaqt (mikrosekund).
+O'lchashdan oldin scoring.evaluate_answers har bir bankda eski
+(savolma-savol) evaluate() bilan solishtiriladi; farq bo'lsa — AssertionError.
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from exam import pick_questions, prepare_block  # noqa: E402
+from question_bank import clear_cache, get_bank  # noqa: E402
+from scoring import evaluate_answers  # noqa: E402
+
+DEFAULT_FILES = [
+    "Kompuyter_tarmoqlari.json",
+    "Elektronika_va_sxemalar.json",
+    "Kiberxavfsizlik.json",
+    "Diskret.json",
+]
+TEST_SIZE = 25
+CHECK_ROUNDS = 20   # evaluate() tekshiruvi uchun tasodifiy javoblar to'plami soni
+
+
+def best_us(fn, repeat, number):
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+
+def evaluate(questions, answers):
+    """Eski streamlit_app.evaluate() — NumPy baholash uchun etalon."""
+    score, results = 0, []
+    for q, ua in zip(questions, answers):
+        if q.get("type") == "calculation":
+            try:
+                uv = float(ua) if ua not in (None, "") else None
+                cv = float(q["to_g_ri_javob"])
+                tol = float(q.get("tolerance", 0.01))
+                ok = uv is not None and abs(uv - cv) <= tol
+            except Exception:
+                ok = False
+                cv = q.get("to_g_ri_javob")
+            results.append({"correct": ok, "user": ua, "answer": cv})
+        else:
+            ca = q.get("javob")
+            ok = (ua == ca) if ua not in (None, "") else False
+            results.append({"correct": ok, "user": ua, "answer": ca})
+        if ok:
+            score += 1
+    return score, results
+
+
+def random_answer(q, rng):
+    """Bo'sh, to'g'ri, xato va buzuq javoblar aralashmasi."""
+    if q.get("type") == "calculation":
+        c = q.get("to_g_ri_javob")
+        return rng.choice([None, "", "abc", c, str(c), f"{_num(c) + 0.005}", f"{_num(c) + 1}"])
+    return rng.choice([None, "", q.get("javob"), "yo'q variant", *(q.get("variantlar") or ())])
+
+
+def _num(v):
+    try:
+        return float(v)
+    except Exception:
+        return 0.0
+
+
+def check_evaluate(fname):
+    """
+    evaluate_answers == evaluate() butun bankda: matnli javoblar va
+    ilovadagidek option id'lar (Bank.interned) bilan.
+    """
+    bank = get_bank(os.path.join(ROOT, fname))
+    questions = [bank[i] for i in range(len(bank))]
+    rng = random.Random(0)
+    for _ in range(CHECK_ROUNDS):
+        answers = [random_answer(q, rng) for q in questions]
+        assert repr(evaluate_answers(questions, answers)) == repr(evaluate(questions, answers)), \
+            f"{fname}: evaluate_answers(matn) != evaluate()"
+
+        # id ko'rinishi: ilovada faqat bo'sh javob yoki variantlardan biri bo'ladi
+        ids, texts = [], []
+        for i, (q, ua) in enumerate(zip(questions, answers)):
+            opts, _ = bank.interned(i)
+            if q.get("type") != "calculation" and ua not in (None, ""):
+                ua = ua if ua in opts else None
+                ids.append(None if ua is None else opts.index(ua))
+            else:
+                ids.append(ua)
+            texts.append(ua)
+        assert repr(evaluate_answers(questions, ids, as_ids=True)) == repr(evaluate(questions, texts)), \
+            f"{fname}: evaluate_answers(id) != evaluate()"
+
+
+def cases(fname):
+    path = os.path.join(ROOT, fname)
+    bank = get_bank(path)
+    rng = random.Random(0)
+    prev = set(rng.sample(range(len(bank)), min(TEST_SIZE, len(bank))))
+    indices = pick_questions(bank, prev, TEST_SIZE, rng)
+    full = list(range(len(bank)))
+    block, perms = prepare_block(bank, indices)
+    questions = [bank[i] for i in block]
+    answers = [rng.choice(perms[k]) if perms[k] else None for k in range(len(block))]
+
+    def cold():
+        clear_cache()
+        get_bank(path)
+
+    return [
+        ("load_questions (kesh)", lambda: get_bank(path), 1000),
+        ("load_questions (sovuq)", cold, 5),
+        ("pick_questions", lambda: pick_questions(bank, prev, TEST_SIZE, rng), 1000),
+        ("prepare_block (25)", lambda: prepare_block(bank, indices), 1000),
+        ("prepare_block (to'liq)", lambda: prepare_block(bank, full), 100),
+        ("evaluate (25)", lambda: evaluate_answers(questions, answers, as_ids=True), 1000),
+    ]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("files", nargs="*", default=DEFAULT_FILES)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    for fname in args.files:
+        check_evaluate(fname)
+        clear_cache()
+
+    print(f"{'fayl':<30} {'bosqich':<24} {'µs/chaqiruv':>12}")
+    for fname in args.files:
+        for name, fn, number in cases(fname):
+            print(f"{fname:<30} {name:<24} {best_us(fn, args.repeat, number):>12.1f}")
+        clear_cache()
+
+
+if __name__ == "__main__":
+    main()
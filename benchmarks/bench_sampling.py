@@ -0,0 +1,57 @@
+"""
+pick_questions(): eski O(n·k) sikl va yangi sampling.pick_indices() taqqoslovi.
+
+    python benchmarks/bench_sampling.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sampling import pick_indices  # noqa: E402
+
+K = 25
+
+
+def legacy_pick(total, prev_indices, n):
+    # streamlit_app.pick_questions() ning oldingi versiyasi (o'zgarishsiz)
+    weights = []
+    for i in range(total):
+        weights.append(1 if i not in prev_indices else 0.33)
+    pool = list(range(total))
+    chosen = []
+    w = weights[:]
+    n = min(n, total)
+    for _ in range(n):
+        total_w = sum(w)
+        r = random.uniform(0, total_w)
+        cum = 0
+        for idx, wi in enumerate(w):
+            cum += wi
+            if r <= cum:
+                chosen.append(pool[idx])
+                w[idx] = 0
+                break
+    return chosen
+
+
+def bench(fn, repeat):
+    best = min(timeit.repeat(fn, number=1, repeat=repeat))
+    return best * 1000
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'n':>8} {'legacy ms':>12} {'new ms':>10} {'speedup':>9}")
+    for total in (200, 10_000, 100_000):
+        prev = set(rng.sample(range(total), min(K, total)))
+        repeat = 20 if total <= 10_000 else 3
+        t_old = bench(lambda: legacy_pick(total, prev, K), repeat)
+        t_new = bench(lambda: pick_indices(total, prev, K, rng), repeat)
+        print(f"{total:>8} {t_old:>12.3f} {t_new:>10.3f} {t_old / t_new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
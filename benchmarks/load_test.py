@@ -0,0 +1,152 @@
+"""
+Streamlit ilovasi uchun headless yuklama testi (streamlit.testing AppTest).
+
+N ta parallel sessiya (har biri alohida thread) fan tanlaydi, testni
+boshlaydi, real oraliqlarda javob beradi va yakunlaydi. Hisobot:
+rerun kechikishi (p50/p90/p99/max), rerun/soniya, CPU vaqti va RSS.
+
+AppTest thread-safe emas (umumiy Runtime), shuning uchun rerunlar bitta
+qulf orqali navbatma-navbat bajariladi — bitta Streamlit jarayonidagi
+GIL bilan cheklangan ishga mos. "kechikish" navbatda kutishni ham o'z
+ichiga oladi, "xizmat" — faqat rerunning o'zi.
+
+    python benchmarks/load_test.py --sessions 20 --think 0.5
+    python benchmarks/load_test.py --sessions 5 --full --answers 40
+
+Tarix bazasi vaqtinchalik faylga yoziladi (TEST_HISTORY_DB).
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "streamlit_app.py")
+
+
+def rss_mb():
+    # Joriy RSS (/proc), bo'lmasa — eng katta RSS (ru_maxrss, KB)
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.run_lock = threading.Lock()
+        self.latencies = []
+        self.service = []
+        self.errors = []
+
+    def timed(self, at, action=None):
+        t0 = time.perf_counter()
+        with self.run_lock:
+            t1 = time.perf_counter()
+            if action is not None:
+                action.run()
+            else:
+                at.run()
+            t2 = time.perf_counter()
+        with self.lock:
+            self.latencies.append(t2 - t0)
+            self.service.append(t2 - t1)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+
+
+def simulate(sid, args, rec):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(args.seed + sid)
+    try:
+        at = AppTest.from_file(APP, default_timeout=args.timeout)
+        rec.timed(at)
+
+        subjects = at.selectbox[0].options
+        rec.timed(at, at.selectbox[0].select_index(rng.randrange(len(subjects))))
+        if args.full:
+            rec.timed(at, at.radio[0].set_value("To'liq test"))
+
+        start = next(b for b in at.button if "BOSHLASH" in b.label)
+        rec.timed(at, start.click())
+
+        ex = at.session_state["exam"]
+        for i in range(min(args.answers, len(ex))):
+            time.sleep(args.think * rng.uniform(0.5, 1.5))
+            radios = [r for r in at.radio if r.key == ex.widget_key(i)]
+            if not radios:
+                break   # sahifadan tashqari (paged rejim)
+            rec.timed(at, radios[0].set_value(rng.choice(radios[0].options)))
+
+        finish = next(b for b in at.button if "YAKUNLASH" in b.label)
+        rec.timed(at, finish.click())
+    except Exception as e:  # noqa: BLE001 — hisobotga yozamiz
+        with rec.lock:
+            rec.errors.append(f"sessiya {sid}: {e!r}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Streamlit ilovasi uchun headless yuklama testi")
+    ap.add_argument("--sessions", type=int, default=10)
+    ap.add_argument("--answers", type=int, default=25, help="har sessiyada javoblar soni")
+    ap.add_argument("--think", type=float, default=0.5, help="javoblar orasidagi o'rtacha pauza (s)")
+    ap.add_argument("--full", action="store_true", help="\"To'liq test\" rejimi")
+    ap.add_argument("--timeout", type=float, default=60)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    os.chdir(ROOT)
+    from streamlit.logger import set_log_level
+    set_log_level("error")
+    tmp = tempfile.mkdtemp(prefix="loadtest-")
+    os.environ["TEST_HISTORY_DB"] = os.path.join(tmp, "history.db")
+    sys.path.insert(0, ROOT)
+
+    rec = Recorder()
+    rss0 = rss_mb()
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    threads = [threading.Thread(target=simulate, args=(sid, args, rec))
+               for sid in range(args.sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    cpu = time.process_time() - cpu0
+
+    lat = [x * 1000 for x in rec.latencies]
+    svc = [x * 1000 for x in rec.service]
+    mode = "To'liq test" if args.full else "25 ta savol"
+    print(f"sessiyalar      : {args.sessions} ({mode})")
+    print(f"rerunlar        : {len(lat)} / {wall:.1f} s = {len(lat) / wall:.1f} rerun/s")
+    print(f"kechikish, ms   : p50 {percentile(lat, 50):.1f} · p90 {percentile(lat, 90):.1f}"
+          f" · p99 {percentile(lat, 99):.1f} · max {max(lat, default=0):.1f}")
+    print(f"xizmat, ms      : p50 {percentile(svc, 50):.1f} · p90 {percentile(svc, 90):.1f}"
+          f" · p99 {percentile(svc, 99):.1f} · max {max(svc, default=0):.1f}")
+    print(f"CPU             : {cpu:.1f} s ({cpu / wall * 100:.0f}% bitta yadro)")
+    print(f"RSS, MB         : {rss0:.0f} -> {rss_mb():.0f}")
+    if rec.errors:
+        print(f"xatolar ({len(rec.errors)}):")
+        for e in rec.errors[:10]:
+            print("  " + e)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
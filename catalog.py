@@ -0,0 +1,137 @@
+"""
+Fanlar katalogi — har bir savollar fayli haqida qisqa ma'lumot
+(savollar soni, turlar bo'yicha taqsimot, sha256, id oralig'i).
+
+Ma'lumot bir marta hisoblanadi va fayllar yonidagi `.catalog.json`
+indeksida saqlanadi. Manba fayl o'zgarmaguncha (mtime/hajm) qayta
+hisoblanmaydi — har rerun'da faqat os.stat() chaqiriladi.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections.abc import Mapping
+
+from bank_pack import SUFFIX, PackedBank, packed_path
+
+INDEX_FILE = ".catalog.json"
+
+# Fan nomi -> savollar fayli (UI va API uchun yagona ro'yxat)
+FILE_MAP = {
+    "Kompyuter Tarmoqlari":    "Kompuyter_tarmoqlari.json",
+    "Elektronika va Sxemalar": "Elektronika_va_sxemalar.json",
+    "Kiberxavfsizlik":         "Kiberxavfsizlik.json",
+    "Diskret Matematika":      "Diskret.json"
+}
+
+_lock = threading.Lock()
+_indexes = {}   # katalog papkasi -> {fayl nomi: entry}
+
+
+def _index_path(folder):
+    return os.path.join(folder, INDEX_FILE)
+
+
+def _load_index(folder):
+    idx = _indexes.get(folder)
+    if idx is None:
+        try:
+            with open(_index_path(folder), "r", encoding="utf-8") as f:
+                idx = json.load(f)
+            if not isinstance(idx, dict):
+                idx = {}
+        except (OSError, ValueError):
+            idx = {}
+        _indexes[folder] = idx
+    return idx
+
+
+def _save_index(folder, idx):
+    path = _index_path(folder)
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(idx, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp, path)
+    except OSError:
+        # Faqat o'qish mumkin bo'lgan papka — indeks xotirada qoladi
+        pass
+
+
+def _describe(path, stat):
+    entry = {
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": None,
+        "count": 0,
+        "types": {},
+        "id_min": None,
+        "id_max": None,
+    }
+    if path.endswith(SUFFIX):
+        # Faqat .qbank bilan tarqatilgan bank: sha — sarlavhadagi manba
+        # JSON xeshi (JSON bilan bir xil), qolgani yozuvlardan
+        try:
+            data = PackedBank(path)
+        except ValueError:
+            return entry
+        entry["sha256"] = data.sha256
+        return _summarize(entry, data)
+    with open(path, "rb") as f:
+        raw = f.read()
+    entry["sha256"] = hashlib.sha256(raw).hexdigest()
+    try:
+        data = json.loads(raw.decode("utf-8"))
+    except (UnicodeDecodeError, ValueError):
+        return entry
+    if not isinstance(data, list):
+        return entry
+    return _summarize(entry, data)
+
+
+def _summarize(entry, data):
+    types, ids = {}, []
+    for q in data:
+        if not isinstance(q, Mapping):     # dict yoki .qbank yozuvi (mappingproxy)
+            continue
+        t = q.get("type", "multiple_choice")
+        types[t] = types.get(t, 0) + 1
+        if isinstance(q.get("id"), int):
+            ids.append(q["id"])
+    entry["count"] = len(data)
+    entry["types"] = types
+    if ids:
+        entry["id_min"], entry["id_max"] = min(ids), max(ids)
+    return entry
+
+
+def subject_info(fname):
+    """
+    Bitta fayl uchun katalog yozuvi (dict). JSON bo'lmasa — uning .qbank'i
+    (question_bank kabi); ikkalasi ham yo'q bo'lsa — None.
+    """
+    path = os.path.abspath(fname)
+    folder, name = os.path.split(path)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        path = packed_path(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+    with _lock:
+        idx = _load_index(folder)
+        entry = idx.get(name)
+        if entry and entry.get("mtime_ns") == stat.st_mtime_ns and entry.get("size") == stat.st_size:
+            return entry
+        entry = _describe(path, stat)
+        idx[name] = entry
+        _save_index(folder, idx)
+        return entry
+
+
+def get_catalog(file_map):
+    """{fan nomi: entry yoki None} — FILE_MAP bo'yicha."""
+    return {subject: subject_info(fname) for subject, fname in file_map.items()}
@@ -0,0 +1,163 @@
+"""
+Kompozit (ko'p fanli) imtihon — blueprint bo'yicha bir nechta bankdan.
+
+    parts = parse_blueprint([{"file": "Kiberxavfsizlik.json", "n": 10},
+                             {"file": "Diskret.json", "n": 5, "type": "calculation"}])
+    cbank, indices = build(parts)
+
+Har bir qism o'z thread'ida yuklanadi (get_bank) va tanlanadi
+(pick_questions, dedup klasterlari bilan) — tayyorlash vaqti eng sekin
+bank bilan chegaralanadi, yig'indisi bilan emas.
+
+CompositeBank — umumiy Bank'lar ustidagi ko'rinish: global indeks =
+qism offset'i + bankdagi indeks, shuning uchun prepare_block(),
+ExamSession va evaluate() uni oddiy bank kabi ishlatadi; savollar
+nusxalanmaydi. key(i) — global noyob kalit ("Diskret#12").
+"""
+import bisect
+import os
+import random
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+from bank_import import TYPES
+from dedup import cluster_map
+from exam import pick_questions
+from question_bank import get_bank
+
+MAX_WORKERS = 8
+
+_lock = threading.Lock()
+_type_cache = {}    # abspath -> (bank, {type: array})
+
+
+class Part:
+    __slots__ = ("file", "n", "type", "label")
+
+    def __init__(self, file, n, type=None, label=None):
+        self.file = file
+        self.n = n
+        self.type = type
+        self.label = label or os.path.splitext(os.path.basename(file))[0]
+
+
+def parse_blueprint(spec):
+    """[{"file", "n", "type"?, "label"?}] -> [Part]; noto'g'ri bo'lsa ValueError."""
+    parts = []
+    for k, p in enumerate(spec, 1):
+        if not isinstance(p, dict) or not p.get("file"):
+            raise ValueError(f"blueprint {k}-qism: 'file' ko'rsatilmagan")
+        n = p.get("n")
+        if isinstance(n, bool) or not isinstance(n, int) or n <= 0:
+            raise ValueError(f"blueprint {k}-qism: n musbat butun son bo'lishi kerak ({n!r})")
+        if p.get("type") is not None and p["type"] not in TYPES:
+            raise ValueError(f"blueprint {k}-qism: noma'lum type {p['type']!r}")
+        parts.append(Part(p["file"], n, p.get("type"), p.get("label")))
+    if not parts:
+        raise ValueError("blueprint bo'sh")
+    return parts
+
+
+class CompositeBank:
+    """Bir nechta Bank ketma-ket — global indeks bo'yicha murojaat."""
+
+    __slots__ = ("parts", "banks", "offsets", "_total")
+
+    def __init__(self, parts, banks):
+        self.parts = parts
+        self.banks = banks
+        self.offsets = []
+        total = 0
+        for b in banks:
+            self.offsets.append(total)
+            total += len(b)
+        self._total = total
+
+    def locate(self, i):
+        """Global indeks -> (qism raqami, bankdagi indeks)."""
+        k = bisect.bisect_right(self.offsets, i) - 1
+        return k, i - self.offsets[k]
+
+    def key(self, i):
+        k, local = self.locate(i)
+        q = self.banks[k][local]
+        return f"{self.parts[k].label}#{q.get('id', local)}"
+
+    def interned(self, i):
+        k, local = self.locate(i)
+        return self.banks[k].interned(local)
+
+    def __len__(self):
+        return self._total
+
+    def __getitem__(self, i):
+        k, local = self.locate(i)
+        return self.banks[k][local]
+
+    def split(self, indices):
+        """Global indekslar -> {qism raqami: [(o'rin, bankdagi indeks)]}."""
+        out = {}
+        for pos, i in enumerate(indices):
+            k, local = self.locate(i)
+            out.setdefault(k, []).append((pos, local))
+        return out
+
+
+def _members(bank, q_type):
+    """Bankdagi `q_type` turidagi savollar indekslari (bank bilan keshda)."""
+    with _lock:
+        hit = _type_cache.get(bank.path)
+        if hit is not None and hit[0] is bank and q_type in hit[1]:
+            return hit[1][q_type]
+    members = array("i", (i for i, q in enumerate(bank)
+                          if q.get("type", "multiple_choice") == q_type))
+    with _lock:
+        hit = _type_cache.get(bank.path)
+        if hit is None or hit[0] is not bank:
+            hit = _type_cache[bank.path] = bank, {}
+        hit[1][q_type] = members
+    return members
+
+
+def _draw(part, seed):
+    # Bitta qism: yuklash + tanlash (pool thread'ida)
+    bank = get_bank(part.file)
+    rng = random.Random(seed)
+    clusters = cluster_map(part.file)
+    if part.type is None:
+        return bank, pick_questions(bank, (), part.n, rng, clusters)
+    members = _members(bank, part.type)
+    sub = {p: clusters[m] for p, m in enumerate(members) if m in clusters} if clusters else None
+    return bank, [members[p] for p in pick_questions(members, (), part.n, rng, sub)]
+
+
+def load(parts):
+    """Blueprint banklari parallel — CompositeBank (tanlovsiz, resume uchun)."""
+    with ThreadPoolExecutor(max_workers=min(len(parts), MAX_WORKERS)) as pool:
+        banks = list(pool.map(lambda p: get_bank(p.file), parts))
+    return CompositeBank(parts, banks)
+
+
+def build(parts, rng=None):
+    """
+    Blueprint bo'yicha imtihon: (CompositeBank, global indekslar).
+    Qismlar tartibi blueprint'dagidek; bank xatolari (FileNotFoundError,
+    JSONDecodeError) chaqiruvchiga uzatiladi.
+    """
+    rng = rng or random
+    seeds = [rng.getrandbits(64) for _ in parts]
+    with ThreadPoolExecutor(max_workers=min(len(parts), MAX_WORKERS)) as pool:
+        drawn = list(pool.map(_draw, parts, seeds))
+    cbank = CompositeBank(parts, [b for b, _ in drawn])
+    indices = [off + i for off, (_, picked) in zip(cbank.offsets, drawn) for i in picked]
+    return cbank, indices
+
+
+def subscores(cbank, indices, results):
+    """Fanlar bo'yicha natija: [(label, to'g'ri, jami)] blueprint tartibida."""
+    groups = cbank.split(indices)
+    return [(cbank.parts[k].label,
+             sum(1 for pos, _ in groups.get(k, ()) if results[pos] and results[pos]["correct"]),
+             len(groups.get(k, ())))
+            for k in range(len(cbank.parts))]
@@ -0,0 +1,186 @@
+"""
+Deyarli bir xil savollarni topish — MinHash + LSH.
+
+Har bir savol shingle'lar to'plamiga aylantiriladi: `savol` matnining
+so'z juftliklari va har bir variant (normalizatsiyadan keyin, tartibsiz).
+MinHash imzolari LSH bandlariga bo'linadi; faqat bir xil bandga tushgan
+juftliklar haqiqiy Jaccard o'xshashligi bilan tekshiriladi — kvadratik
+taqqoslash yo'q. Bog'langan juftliklar union-find bilan klasterlarga
+birlashtiriladi.
+
+Natija — banklar yonidagi `.clusters.json` (CLUSTER_FILE): har bir bank
+uchun sha256 va klasterlar (bank indekslari). pick_questions() shu
+xaritadan bir testga bitta klasterdan ikki savol tushmasligi uchun
+foydalanadi; bank o'zgarsa (sha256 boshqa), xarita e'tiborsiz qoldiriladi.
+
+    python dedup.py Diskret.json Kiberxavfsizlik.json ...
+"""
+import json
+import os
+import sys
+import threading
+import zlib
+
+import numpy as np
+
+from catalog import subject_info
+from question_bank import get_bank
+from search_index import tokens
+
+CLUSTER_FILE = ".clusters.json"
+THRESHOLD = 0.6     # Jaccard o'xshashligi shundan yuqori — dublikat
+NUM_PERM = 120
+BANDS = 20          # 20 band x 6 qator: LSH chegarasi ~ (1/20)^(1/6) = 0.61
+SHINGLE = 2
+
+_PRIME = (1 << 61) - 1
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, 1 << 31, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 31, NUM_PERM, dtype=np.uint64)
+
+
+def shingles(q):
+    words = tokens(q.get("savol", ""))
+    out = {" ".join(words[i:i + SHINGLE]) for i in range(max(1, len(words) - SHINGLE + 1))}
+    out.update("|" + " ".join(tokens(v)) for v in q.get("variantlar") or ())
+    return out
+
+
+def minhash(sh):
+    x = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in sh), dtype=np.uint64, count=len(sh))
+    # a < 2^31, x < 2^32 — ko'paytma uint64 ga sig'adi
+    return ((_A[:, None] * x[None, :] + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def find_clusters(items, threshold=THRESHOLD):
+    """
+    `items` — [(kalit, savol)]. Qaytaradi: [[kalit, ...], ...] — har
+    biri kamida 2 a'zoli klaster.
+    """
+    keys = [k for k, _ in items]
+    sets = [shingles(q) for _, q in items]
+    rows = NUM_PERM // BANDS
+
+    parent = list(range(len(items)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    buckets = [{} for _ in range(BANDS)]
+    checked = set()
+    for i, sh in enumerate(sets):
+        sig = minhash(sh)
+        for b in range(BANDS):
+            band = sig[b * rows:(b + 1) * rows].tobytes()
+            for j in buckets[b].setdefault(band, []):
+                if (j, i) in checked or find(i) == find(j):
+                    continue
+                checked.add((j, i))
+                if jaccard(sets[i], sets[j]) >= threshold:
+                    parent[find(i)] = find(j)
+            buckets[b][band].append(i)
+
+    groups = {}
+    for i in range(len(items)):
+        groups.setdefault(find(i), []).append(keys[i])
+    return [g for g in groups.values() if len(g) > 1]
+
+
+def build(fnames, threshold=THRESHOLD):
+    """
+    Banklar bo'yicha klasterlar (banklararo ham). Qaytaradi:
+    (klasterlar [[(fayl, indeks), ...]], xarita {fayl: {sha256, clusters}}).
+    """
+    items = []
+    for fname in fnames:
+        items.extend(((fname, i), q) for i, q in enumerate(get_bank(fname)))
+    clusters = find_clusters(items, threshold)
+    cmap = {}
+    for fname in fnames:
+        info = subject_info(fname)
+        cmap[os.path.basename(fname)] = {"sha256": info["sha256"] if info else None,
+                                         "clusters": []}
+    for members in clusters:
+        per_file = {}
+        for fname, i in members:
+            per_file.setdefault(os.path.basename(fname), []).append(i)
+        for name, idx in per_file.items():
+            if len(idx) > 1:
+                cmap[name]["clusters"].append(sorted(idx))
+    return clusters, cmap
+
+
+def save_map(folder, cmap):
+    path = os.path.join(folder, CLUSTER_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            old = json.load(f)
+    except (OSError, ValueError):
+        old = {}
+    old.update(cmap)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(old, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+    return path
+
+
+_lock = threading.Lock()
+_maps = {}  # xarita fayli -> (mtime_ns, dict)
+
+
+def cluster_map(fname):
+    """
+    {bank indeksi: klaster raqami} — faqat klaster a'zolari. Xarita yo'q
+    yoki bank o'zgargan bo'lsa — None.
+    """
+    path = os.path.abspath(fname)
+    folder, name = os.path.split(path)
+    map_path = os.path.join(folder, CLUSTER_FILE)
+    try:
+        mtime = os.stat(map_path).st_mtime_ns
+    except OSError:
+        return None
+    with _lock:
+        cached = _maps.get(map_path)
+        if cached is None or cached[0] != mtime:
+            try:
+                with open(map_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            cached = _maps[map_path] = (mtime, {
+                n: (e.get("sha256"), {i: c for c, idx in enumerate(e.get("clusters", ())) for i in idx})
+                for n, e in data.items() if isinstance(e, dict)})
+    sha, members = cached[1].get(name, (None, None))
+    info = subject_info(fname)
+    if not members or not info or info["sha256"] != sha:
+        return None
+    return members
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Foydalanish: python dedup.py FAN.json [FAN.json ...]")
+        sys.exit(2)
+    fnames = sys.argv[1:]
+    clusters, cmap = build(fnames)
+    for members in sorted(clusters, key=len, reverse=True):
+        print(f"── {len(members)} ta savol")
+        for fname, i in members:
+            q = get_bank(fname)[i]
+            print(f"   {os.path.basename(fname)}#{q.get('id', i)}: {str(q.get('savol', ''))[:80]}")
+    folders = {os.path.dirname(os.path.abspath(f)) for f in fnames}
+    for folder in folders:
+        part = {n: e for n, e in cmap.items()
+                if os.path.exists(os.path.join(folder, n))}
+        print(save_map(folder, part))
+    total = sum(len(e["clusters"]) for e in cmap.values())
+    print(f"{len(clusters)} ta klaster ({total} tasi bank ichida)")
@@ -0,0 +1,254 @@
+"""
+Test blokini tayyorlash — Streamlit'ga bog'liq bo'lmagan qism
+(streamlit_app.py, benchmarklar va boshqa modullar uchun umumiy).
+
+Deterministik generatsiya: (fan fayli, bank sha256, seed) -> seed_key.
+Savollar tanlovi random.Random(seed_key) dan, i-o'rindagi variantlar
+tartibi random.Random(f"{seed_key}|{i}") dan — sahifalar qaysi tartibda
+ochilishidan qat'i nazar bir xil. Shuning uchun permutatsiyalarni
+saqlash shart emas (checkpoint'da faqat seed_key), urinishni esa
+apellyatsiya uchun aynan qayta tiklash mumkin:
+
+    python exam.py URINISH_ID
+"""
+import collections
+import os
+import random
+import sys
+import threading
+from array import array
+
+from sampling import iter_indices, pick_indices
+
+SEED_CACHE = 256    # bir xil seed'li tayyor bloklar keshi (sessiyalar uchun umumiy)
+
+_lock = threading.Lock()
+_blocks = collections.OrderedDict()     # (seed_key, n) -> (indices, perms)
+
+
+def pick_questions(all_q, prev_indices, n, rng=None, clusters=None, skip=None):
+    """
+    Weighted random: oldingi testda chiqqan savollar 3x kamroq ehtimol.
+    Bir testda qaytarilmaydi (sampling.pick_indices).
+    `clusters` — {indeks: klaster} (dedup.cluster_map): bir klasterdan
+    faqat birinchi chiqqan savol olinadi.
+    `skip(i)` — True bo'lsa savol o'tkazib yuboriladi (review.py).
+    """
+    if not clusters and skip is None:
+        return pick_indices(len(all_q), prev_indices, n, rng)
+    chosen, used = [], set()
+    if n <= 0:
+        return chosen
+    for i in iter_indices(len(all_q), prev_indices, rng):
+        if skip is not None and skip(i):
+            continue
+        c = clusters.get(i) if clusters else None
+        if c is not None:
+            if c in used:
+                continue
+            used.add(c)
+        chosen.append(i)
+        if len(chosen) >= n:
+            break
+    return chosen
+
+
+def prepare_block(bank, indices, lazy=False, seed=None):
+    """
+    Sessiyada faqat bank indekslari va variantlar permutatsiyasi saqlanadi —
+    savollar umumiy bankda qoladi, dict/list nusxalari olinmaydi.
+    perms[i] — internlangan option id'larning aralash tartibi (bytes).
+    lazy=True — permutatsiya sahifa birinchi ochilganda (materialize_perms).
+    seed — seed_key: berilsa, permutatsiyalar undan (deterministik).
+    """
+    indices = array("i", indices)
+    perms = [None] * len(indices)
+    if not lazy:
+        materialize_perms(bank, indices, perms, 0, len(indices), seed)
+    return indices, perms
+
+
+def materialize_perms(bank, indices, perms, lo, hi, seed=None):
+    for i in range(lo, hi):
+        if perms[i] is None:
+            opts, _ = bank.interned(indices[i])
+            if opts:
+                p = list(range(len(opts)))
+                (random.Random(f"{seed}|{i}") if seed is not None else random).shuffle(p)
+                perms[i] = bytes(p) if len(p) < 256 else tuple(p)
+
+
+# ── Seed bo'yicha generatsiya ───────────────────
+
+def seed_key(subject, bank_sha, seed):
+    """Test nusxasining to'liq identifikatori: "Diskret.json|<sha256>|<seed>"."""
+    return f"{os.path.basename(subject)}|{bank_sha}|{seed}"
+
+
+def new_seed():
+    return random.SystemRandom().getrandbits(31)
+
+
+def generate(bank, key, n=None, prev=(), clusters=None, lazy=False):
+    """
+    seed_key bo'yicha blok: n ta savol (pick_questions) yoki n=None —
+    butun bank aralash tartibda. Bir xil kalit va kirish -> bir xil blok.
+    """
+    rng = random.Random(key)
+    if n is None:
+        indices = list(range(len(bank)))
+        rng.shuffle(indices)
+    else:
+        indices = pick_questions(bank, prev, n, rng, clusters)
+    return prepare_block(bank, indices, lazy, seed=key)
+
+
+def cached_block(bank, key, n=None, clusters=None):
+    """
+    generate() (prev'siz) natijasi keshdan — bir xil seed'li sessiyalar
+    bitta indeks massivi va permutatsiyalar tuple'ini bo'lishadi.
+    """
+    ck = key, n
+    with _lock:
+        hit = _blocks.get(ck)
+        if hit is not None:
+            _blocks.move_to_end(ck)
+            return hit
+    indices, perms = generate(bank, key, n, clusters=clusters)
+    block = indices, tuple(perms)
+    with _lock:
+        block = _blocks.setdefault(ck, block)
+        while len(_blocks) > SEED_CACHE:
+            _blocks.popitem(last=False)
+    return block
+
+
+class ExamSession:
+    """
+    Bitta sessiyaning test holati — bitta obyekt (st.session_state["exam"]):
+    bank havolasi, indekslar va permutatsiyalar massivi, javoblar ro'yxati
+    (option id yoki son) va javob berilganlar hisoblagichi — u har javobda
+    inkremental yangilanadi, har rerun'da qayta sanalmaydi.
+    Testni tozalash — obyektni almashtirish; widget kalitlari `key`
+    prefiksli, eski test widget'lari Streamlit tomonidan o'zi tashlanadi.
+    """
+
+    __slots__ = ("key", "bank", "indices", "perms", "answers", "answered",
+                 "answer_times", "instant", "results", "score", "started",
+                 "finished", "t_start", "t_end", "page", "sid", "bank_sha", "seed")
+
+    def __init__(self, bank, indices, perms):
+        self.key = os.urandom(4).hex()
+        self.bank = bank
+        self.indices = indices
+        self.perms = perms
+        self.answers = [None] * len(indices)
+        self.answered = 0
+        self.answer_times = {}
+        self.instant = {}
+        self.results = [None] * len(indices)
+        self.score = 0
+        self.started = False
+        self.finished = False
+        self.t_start = None
+        self.t_end = None
+        self.page = 0
+        self.sid = None
+        self.bank_sha = None
+        self.seed = None    # seed_key — permutatsiyalar shundan qayta tiklanadi
+
+    def __len__(self):
+        return len(self.indices)
+
+    @property
+    def variant(self):
+        """Foydalanuvchiga ko'rsatiladigan seed (apellyatsiya uchun)."""
+        return self.seed.rsplit("|", 1)[-1] if self.seed else None
+
+    def widget_key(self, i):
+        return f"_w{self.key}_{i}"
+
+    def _filled(self, i, val):
+        # Bo'sh qiymat va matni "" bo'lgan variant — javob hisoblanmaydi
+        if val in (None, ""):
+            return False
+        qi = self.indices[i]
+        if isinstance(val, int) and self.bank[qi].get("type", "multiple_choice") == "multiple_choice":
+            opts, _ = self.bank.interned(qi)
+            return not 0 <= val < len(opts) or opts[val] != ""
+        return True
+
+    def answer(self, i, val, at=None):
+        """i-savol javobi; hisoblagich faqat bo'sh <-> javob o'tishida o'zgaradi."""
+        had = self._filled(i, self.answers[i])
+        has = self._filled(i, val)
+        self.answers[i] = val
+        self.answered += has - had
+        if at is not None:
+            self.answer_times[i] = at
+
+    def answered_in(self, lo, hi):
+        return sum(1 for i in range(lo, hi) if self._filled(i, self.answers[i]))
+
+    def questions(self):
+        return [self.bank[i] for i in self.indices]
+
+
+def replay(attempt_id, db_path=None):
+    """
+    Tarixdagi urinishni qayta tiklaydi: [(o'rin, savol, variantlar tartibi,
+    talaba javobi, to'g'rimi)]. Urinish seed'siz bo'lsa yoki bank o'sha
+    urinishdan keyin o'zgargan bo'lsa (seed_key'dagi sha mos emas) — ValueError.
+    """
+    import history
+    from catalog import subject_info
+    from question_bank import get_bank
+    conn = history.connect(db_path)
+    try:
+        row = conn.execute("SELECT subject, seed FROM attempts WHERE id = ?",
+                           (attempt_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"Urinish topilmadi: {attempt_id}")
+        subject, key = row
+        if not key:
+            raise ValueError(f"{attempt_id}-urinish seed'siz yozilgan")
+        answers = conn.execute(
+            "SELECT pos, q_idx, user_answer, correct FROM answers WHERE attempt_id = ?"
+            " ORDER BY pos", (attempt_id,)).fetchall()
+    finally:
+        conn.close()
+    sha = key.split("|")[1] if key.count("|") == 2 else None
+    info = subject_info(subject)
+    if info is None:
+        raise ValueError(f"Savollar banki topilmadi: {subject}")
+    if info["sha256"] != sha:
+        raise ValueError(f"{attempt_id}-urinishdan keyin '{subject}' banki o'zgargan"
+                         " — asl testni tiklab bo'lmaydi")
+    bank = get_bank(subject)
+    indices = array("i", [0] * (answers[-1][0] + 1 if answers else 0))
+    for pos, q_idx, _, _ in answers:
+        indices[pos] = q_idx
+    _, perms = prepare_block(bank, indices, seed=key)
+    out = []
+    for pos, q_idx, ua, ok in answers:
+        opts, _ = bank.interned(q_idx)
+        out.append((pos, bank[q_idx], [opts[o] for o in (perms[pos] or ())], ua, bool(ok)))
+    return subject, key, out
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2 or not sys.argv[1].isdigit():
+        print("Foydalanish: python exam.py URINISH_ID")
+        sys.exit(2)
+    try:
+        subject, key, rows = replay(int(sys.argv[1]))
+    except (OSError, ValueError) as e:
+        print(e)
+        sys.exit(1)
+    print(f"{subject} · seed {key.rsplit('|', 1)[-1]}")
+    for pos, q, opts, ua, ok in rows:
+        print(f"\n{pos + 1}. [{q.get('id', '')}] {q['savol']}")
+        for j, o in enumerate(opts):
+            print(f"   {'ABCDEFGH'[j] if j < 8 else j + 1}) {o}")
+        mark = "to'g'ri" if ok else "xato"
+        print(f"   javob: {ua if ua is not None else '—'} ({mark})")
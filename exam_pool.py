@@ -0,0 +1,128 @@
+"""
+Oldindan tayyorlangan test to'plamlari (indekslar + permutatsiyalar).
+
+Imtihon boshida yuzlab sessiya bir vaqtda ochilganda pick_questions() va
+prepare_block() so'rov thread'ida ishlamasligi uchun har bir (fan, n)
+juftligi bo'yicha tayyor bloklar navbati saqlanadi. Sessiya bittasini
+oladi (claim); navbat LOW_WATER dan kamaysa, fon thread'i uni TARGET
+gacha to'ldiradi.
+
+n=None — "To'liq test" (butun bank): blokda faqat seed va aralash
+indekslar, permutatsiyalar sahifa ochilganda (materialize_perms) seed'dan.
+Bank qayta yuklansa (fayl o'zgarsa), eski bloklar tashlab yuboriladi.
+
+Hovuzdagi bloklar oldingi urinishlarni (prev_indices) hisobga olmaydi —
+prev bo'sh bo'lmasa, chaqiruvchi blokni o'zi tayyorlaydi.
+Har bir blok tasodifiy seed bilan (exam.generate) — seed_key u bilan
+birga beriladi, test nusxasini keyin qayta tiklash mumkin.
+"""
+import collections
+import logging
+import os
+import queue
+import threading
+
+from catalog import subject_info
+from dedup import cluster_map
+from exam import generate, new_seed, seed_key
+from question_bank import get_bank
+
+TARGET = int(os.environ.get("TEST_POOL_SIZE", "16"))
+LOW_WATER = max(1, TARGET // 4)
+
+_log = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pools = {}         # (abspath, n) -> deque[(bank, seed_key, indices, perms)]
+_pending = set()    # navbatga qo'yilgan, hali to'ldirilmagan kalitlar
+_stats = {"hits": 0, "misses": 0, "built": 0}
+_jobs = queue.Queue()
+_worker = None
+
+
+def build_block(bank, fname, n=None, clusters=None, bank_sha=None):
+    """
+    Bitta yangi blok yangi seed bilan: (seed_key, (indices, perms)).
+    n ta savol (prev'siz) yoki n=None — butun bank aralash tartibda
+    (lazy: perms bo'sh, bank yozuvlari dekodlanmaydi).
+    """
+    if bank_sha is None:
+        bank_sha = (subject_info(fname) or {}).get("sha256")
+    key = seed_key(fname, bank_sha, new_seed())
+    return key, generate(bank, key, n, clusters=clusters, lazy=n is None)
+
+
+def _key(fname, n):
+    return os.path.abspath(fname), n
+
+
+def _run():
+    while True:
+        fname, n = key = _jobs.get()
+        try:
+            bank = get_bank(fname)
+            bank_sha = (subject_info(fname) or {}).get("sha256")
+            while True:
+                with _lock:
+                    pool = _pools.setdefault(key, collections.deque())
+                    while pool and pool[0][0] is not bank:
+                        pool.popleft()
+                    if len(pool) >= TARGET:
+                        break
+                sk, (indices, perms) = build_block(bank, fname, n, cluster_map(fname), bank_sha)
+                with _lock:
+                    pool.append((bank, sk, indices, perms))
+                    _stats["built"] += 1
+        except Exception:
+            _log.exception("exam_pool: %s (n=%s) to'ldirilmadi", fname, n)
+        finally:
+            with _lock:
+                _pending.discard(key)
+
+
+def _schedule(key):
+    # _lock ichida chaqiriladi
+    global _worker
+    if key in _pending:
+        return
+    _pending.add(key)
+    if _worker is None:
+        _worker = threading.Thread(target=_run, name="exam-pool", daemon=True)
+        _worker.start()
+    _jobs.put(key)
+
+
+def warm(fname, n=None):
+    """Hovuz LOW_WATER dan past bo'lsa, fonda to'ldirishni boshlaydi."""
+    key = _key(fname, n)
+    with _lock:
+        if len(_pools.get(key, ())) < LOW_WATER:
+            _schedule(key)
+
+
+def claim(bank, fname, n=None):
+    """
+    Tayyor blokni oladi: (seed_key, (indices, perms)). Hovuz bo'sh yoki
+    bloklar boshqa (eski) bankniki bo'lsa — None; chaqiruvchi o'zi quradi.
+    """
+    key = _key(fname, n)
+    with _lock:
+        pool = _pools.get(key)
+        block = None
+        while pool:
+            b, sk, indices, perms = pool.popleft()
+            if b is bank:
+                block = sk, (indices, perms)
+                break
+        if block is None:
+            _stats["misses"] += 1
+        else:
+            _stats["hits"] += 1
+        if pool is None or len(pool) < LOW_WATER:
+            _schedule(key)
+    return block
+
+
+def pool_stats():
+    with _lock:
+        return {**_stats, "ready": sum(len(p) for p in _pools.values())}
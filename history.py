@@ -0,0 +1,359 @@
+"""
+Urinishlar tarixi — SQLite (WAL rejimi).
+
+Yozish fon thread'idagi navbat orqali: "TESTNI YAKUNLASH" / vaqt tugashi
+diskni kutmaydi, record_attempt() faqat navbatga qo'yadi. Writer navbatda
+to'plangan yozuvlarni bitta tranzaksiyada yozadi; har urinish o'z
+SAVEPOINT'ida, shuning uchun bitta buzuq yozuv qolganlarini bekor
+qilmaydi. Yozilmagan urinish MAX_RETRIES marta qayta uriniladi, keyin
+`<baza>.failed.jsonl` ga (dead-letter) JSON qator sifatida tushadi.
+
+O'qish (seen_indices va h.k.) — har chaqiruvda qisqa ulanish; WAL tufayli
+writer bilan bir-birini bloklamaydi.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+DB_PATH = os.environ.get("TEST_HISTORY_DB", "history.db")
+PREV_WINDOW = 5      # prev_indices uchun oxirgi nechta urinish hisobga olinadi
+BATCH_SIZE = 64
+MAX_RETRIES = 3
+RETRY_DELAY = 1.0    # qayta urinishlar orasidagi pauza (soniya)
+MAX_ITEM_TIME = 600  # bitta savolga sarflangan vaqt shundan oshsa — hisobga olinmaydi
+
+_log = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    user        TEXT,
+    subject     TEXT NOT NULL,
+    mode        TEXT NOT NULL,
+    started_at  REAL,
+    finished_at REAL NOT NULL,
+    score       INTEGER NOT NULL,
+    total       INTEGER NOT NULL,
+    timed_out   INTEGER NOT NULL DEFAULT 0,
+    seed        TEXT    -- exam.seed_key: urinishni qayta tiklash uchun
+);
+CREATE INDEX IF NOT EXISTS attempts_user ON attempts (user, subject, finished_at);
+
+CREATE TABLE IF NOT EXISTS answers (
+    attempt_id  INTEGER NOT NULL REFERENCES attempts (id),
+    pos         INTEGER NOT NULL,
+    q_idx       INTEGER NOT NULL,
+    q_id        TEXT,
+    user_answer TEXT,
+    correct     INTEGER NOT NULL,
+    answered_at REAL,
+    PRIMARY KEY (attempt_id, pos)
+);
+CREATE INDEX IF NOT EXISTS answers_q ON answers (q_idx);
+
+-- Savol statistikasi (adaptive.py): har urinishdan keyin inkremental
+-- yangilanadi. y — urinishning qolgan savollar bo'yicha ulushi (rest score).
+CREATE TABLE IF NOT EXISTS item_stats (
+    subject     TEXT NOT NULL,
+    q_idx       INTEGER NOT NULL,
+    n           INTEGER NOT NULL DEFAULT 0,
+    correct     INTEGER NOT NULL DEFAULT 0,
+    sum_y       REAL NOT NULL DEFAULT 0,
+    sum_y2      REAL NOT NULL DEFAULT 0,
+    sum_xy      REAL NOT NULL DEFAULT 0,
+    time_n      INTEGER NOT NULL DEFAULT 0,
+    time_sum    REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (subject, q_idx)
+);
+
+-- Takrorlash rejalashtiruvchisi (review.py, SM-2). due — keyingi
+-- takrorlash vaqti; (user, subject, due) indeksi — ustuvor navbat.
+CREATE TABLE IF NOT EXISTS review (
+    user        TEXT NOT NULL,
+    subject     TEXT NOT NULL,
+    q_idx       INTEGER NOT NULL,
+    ease        REAL NOT NULL,
+    interval    REAL NOT NULL,
+    reps        INTEGER NOT NULL,
+    lapses      INTEGER NOT NULL DEFAULT 0,
+    due         REAL NOT NULL,
+    PRIMARY KEY (user, subject, q_idx)
+);
+CREATE INDEX IF NOT EXISTS review_due ON review (user, subject, due);
+"""
+
+# Urinish yozilgach, o'sha tranzaksiya ichida chaqiriladi: fn(conn, attempt)
+_hooks = []
+
+
+def add_hook(fn):
+    """Writer uchun qo'shimcha yangilovchi (masalan review.py rejalashtiruvchisi)."""
+    if fn not in _hooks:
+        _hooks.append(fn)
+
+
+def connect(path=None):
+    conn = sqlite3.connect(path or DB_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    # Eski bazalar: seed ustuni keyinroq qo'shilgan
+    if "seed" not in {r[1] for r in conn.execute("PRAGMA table_info(attempts)")}:
+        try:
+            conn.execute("ALTER TABLE attempts ADD COLUMN seed TEXT")
+        except sqlite3.OperationalError:
+            pass    # boshqa ulanish shu orada qo'shdi
+    return conn
+
+
+class HistoryWriter:
+    """Navbatdagi urinishlarni fon thread'ida to'plab (batch) yozadi."""
+
+    def __init__(self, path=None):
+        self.path = path or DB_PATH
+        self._q = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, attempt):
+        self._q.put(attempt)
+
+    def flush(self, timeout=None):
+        """Navbat bo'shab, hammasi yozilguncha kutadi (test va chiqishda)."""
+        done = threading.Event()
+        self._q.put(done)
+        return done.wait(timeout)
+
+    def _run(self):
+        conn = None
+        retry, waiting = [], []     # [(urinish, urinishlar soni)], flush event'lari
+        while True:
+            try:
+                batch = [self._q.get(timeout=RETRY_DELAY if retry else None)]
+            except queue.Empty:
+                batch = []
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self._q.get_nowait())
+                except queue.Empty:
+                    break
+            waiting += [b for b in batch if isinstance(b, threading.Event)]
+            pending = retry + [(b, 0) for b in batch if not isinstance(b, threading.Event)]
+            retry = []
+            if pending:
+                try:
+                    if conn is None:
+                        conn = connect(self.path)
+                    failed = self._write(conn, [a for a, _ in pending])
+                    tries = {id(a): n for a, n in pending}
+                    retry = self._retry([(a, tries[id(a)]) for a in failed])
+                except Exception:  # noqa: BLE001 — writer thread hech qachon to'xtamasligi kerak
+                    _log.exception("history: %d ta urinish yozilmadi", len(pending))
+                    if conn is not None:
+                        conn.close()
+                        conn = None
+                    retry = self._retry(pending)
+            if not retry:
+                for e in waiting:
+                    e.set()
+                waiting = []
+
+    def _write(self, conn, attempts):
+        """Bitta tranzaksiya, har urinish — SAVEPOINT. Yozilmaganlarini qaytaradi."""
+        failed = []
+        conn.execute("BEGIN")
+        try:
+            for a in attempts:
+                conn.execute("SAVEPOINT attempt")
+                try:
+                    _insert(conn, a)
+                except Exception:  # noqa: BLE001 — faqat shu urinish bekor qilinadi
+                    _log.exception("history: urinish yozilmadi (%s)", a.get("subject"))
+                    conn.execute("ROLLBACK TO attempt")
+                    failed.append(a)
+                conn.execute("RELEASE attempt")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return failed
+
+    def _retry(self, items):
+        # MAX_RETRIES dan oshganlari — dead-letter fayliga
+        out = []
+        for a, n in items:
+            if n + 1 < MAX_RETRIES:
+                out.append((a, n + 1))
+            else:
+                self._dead_letter(a)
+        return out
+
+    def _dead_letter(self, a):
+        path = self.path + ".failed.jsonl"
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(a, ensure_ascii=False, default=str) + "\n")
+            _log.error("history: urinish %s ga ko'chirildi", path)
+        except OSError:
+            _log.exception("history: urinish yo'qoldi: %r", a)
+
+
+def _insert(conn, a):
+    cur = conn.execute(
+        "INSERT INTO attempts (user, subject, mode, started_at, finished_at, score, total,"
+        " timed_out, seed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (a.get("user") or None, a["subject"], a["mode"], a.get("started_at"),
+         a["finished_at"], a["score"], a["total"], int(a.get("timed_out", False)),
+         a.get("seed")))
+    attempt_id = cur.lastrowid
+    conn.executemany(
+        "INSERT INTO answers (attempt_id, pos, q_idx, q_id, user_answer, correct, answered_at)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(attempt_id, pos, ans["q_idx"], None if ans.get("q_id") is None else str(ans["q_id"]),
+          None if ans.get("user") is None else str(ans["user"]),
+          int(bool(ans["correct"])), ans.get("answered_at"))
+         for pos, ans in enumerate(a["answers"])])
+    _update_item_stats(conn, a)
+    for fn in _hooks:
+        fn(conn, a)
+
+
+def _item_times(a):
+    """{pos: soniya} — javoblar orasidagi farq (birinchisi boshlanishdan)."""
+    if a.get("started_at") is None:
+        return {}
+    timed = sorted((ans["answered_at"], pos) for pos, ans in enumerate(a["answers"])
+                   if ans.get("answered_at") is not None)
+    out, prev = {}, a["started_at"]
+    for t, pos in timed:
+        if 0 <= t - prev <= MAX_ITEM_TIME:
+            out[pos] = t - prev
+        prev = t
+    return out
+
+
+def _update_item_stats(conn, a):
+    # O(javoblar soni): har bir savol qatoriga bitta UPSERT
+    total, score = a["total"], a["score"]
+    times = _item_times(a)
+    rows = []
+    for pos, ans in enumerate(a["answers"]):
+        x = int(bool(ans["correct"]))
+        y = (score - x) / (total - 1) if total > 1 else 0.0
+        dt = times.get(pos)
+        rows.append((a["subject"], ans["q_idx"], x, y, y * y, x * y,
+                     int(dt is not None), dt or 0.0))
+    conn.executemany(
+        "INSERT INTO item_stats (subject, q_idx, n, correct, sum_y, sum_y2, sum_xy, time_n, time_sum)"
+        " VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?)"
+        " ON CONFLICT (subject, q_idx) DO UPDATE SET"
+        " n = n + 1, correct = correct + excluded.correct,"
+        " sum_y = sum_y + excluded.sum_y, sum_y2 = sum_y2 + excluded.sum_y2,"
+        " sum_xy = sum_xy + excluded.sum_xy,"
+        " time_n = time_n + excluded.time_n, time_sum = time_sum + excluded.time_sum",
+        rows)
+
+
+def rebuild_item_stats(conn, subject):
+    """
+    item_stats ni answers jadvalidan qayta hisoblaydi (masalan, regrade
+    dan keyin). Vaqt ustunlari o'zgarmaydi.
+    """
+    with conn:
+        conn.execute(
+            "INSERT INTO item_stats (subject, q_idx, n, correct, sum_y, sum_y2, sum_xy)"
+            " SELECT ?, q_idx, COUNT(*), SUM(x), SUM(y), SUM(y * y), SUM(x * y) FROM ("
+            "   SELECT a.q_idx AS q_idx, a.correct AS x,"
+            "          CASE WHEN t.total > 1 THEN (t.score - a.correct) * 1.0 / (t.total - 1)"
+            "               ELSE 0.0 END AS y"
+            "   FROM answers a JOIN attempts t ON t.id = a.attempt_id WHERE t.subject = ?)"
+            " GROUP BY q_idx"
+            " ON CONFLICT (subject, q_idx) DO UPDATE SET"
+            " n = excluded.n, correct = excluded.correct, sum_y = excluded.sum_y,"
+            " sum_y2 = excluded.sum_y2, sum_xy = excluded.sum_xy",
+            (subject, subject))
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = HistoryWriter()
+                atexit.register(_writer.flush, 5)
+    return _writer
+
+
+def record_attempt(user, subject, mode, indices, questions, results, started_at=None,
+                   answer_times=None, timed_out=False, seed=None):
+    """
+    Urinishni navbatga qo'yadi (bloklamaydi).
+    `indices` — savollarning bankdagi indekslari, `questions` — mos savollar,
+    `results` — evaluate() natijalari, `answer_times` — {pos: unix vaqt},
+    `seed` — exam.seed_key (python exam.py URINISH_ID bilan qayta tiklash).
+    """
+    answer_times = answer_times or {}
+    get_writer().submit({
+        "user": user,
+        "subject": subject,
+        "mode": mode,
+        "started_at": started_at,
+        "finished_at": time.time(),
+        "score": sum(1 for r in results if r["correct"]),
+        "total": len(results),
+        "timed_out": timed_out,
+        "seed": seed,
+        "answers": [
+            {"q_idx": int(qi), "q_id": q.get("id"), "user": r["user"],
+             "correct": r["correct"], "answered_at": answer_times.get(pos)}
+            for pos, (qi, q, r) in enumerate(zip(indices, questions, results))
+        ],
+    })
+
+
+def user_accuracy(user, subject, window=PREV_WINDOW):
+    """Oxirgi `window` urinishdagi to'g'ri javoblar ulushi; tarix yo'q bo'lsa — None."""
+    if not user or not os.path.exists(DB_PATH):
+        return None
+    try:
+        conn = sqlite3.connect(DB_PATH, timeout=5)
+        try:
+            row = conn.execute(
+                "SELECT SUM(score), SUM(total) FROM (SELECT score, total FROM attempts"
+                " WHERE user = ? AND subject = ? ORDER BY finished_at DESC LIMIT ?)",
+                (user, subject, window)).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        _log.exception("history: user_accuracy o'qilmadi")
+        return None
+    return row[0] / row[1] if row and row[1] else None
+
+
+def seen_indices(user, subject, window=PREV_WINDOW):
+    """Foydalanuvchining oxirgi `window` urinishida chiqqan savol indekslari."""
+    if not user or not os.path.exists(DB_PATH):
+        return set()
+    try:
+        conn = sqlite3.connect(DB_PATH, timeout=5)
+        try:
+            rows = conn.execute(
+                "SELECT DISTINCT a.q_idx FROM answers a"
+                " JOIN (SELECT id FROM attempts WHERE user = ? AND subject = ?"
+                "       ORDER BY finished_at DESC LIMIT ?) t ON t.id = a.attempt_id",
+                (user, subject, window)).fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        _log.exception("history: seen_indices o'qilmadi")
+        return set()
+    return {r[0] for r in rows}
@@ -0,0 +1,163 @@
+"""
+Hot-path o'lchovlari: bosqich taymerlari, hisoblagichlar, gistogramma.
+
+Default holatda o'chiq — TEST_METRICS=1 bo'lsa yoqiladi. O'chiq paytda
+start() None qaytaradi va stop() darhol chiqadi, ya'ni har rerun'dagi
+qo'shimcha ish bitta `if` dan iborat.
+
+Eksport:
+  * prometheus_text() — Prometheus text formati (admin panelda ko'rinadi);
+  * TEST_METRICS_FILE berilsa, fon thread'i har TEST_METRICS_INTERVAL
+    soniyada shu faylga yozadi (node_exporter textfile collector uchun).
+"""
+import bisect
+import os
+import threading
+import time
+from collections import deque
+
+ENABLED = os.environ.get("TEST_METRICS", "") not in ("", "0")
+DUMP_FILE = os.environ.get("TEST_METRICS_FILE")
+DUMP_INTERVAL = float(os.environ.get("TEST_METRICS_INTERVAL", "15"))
+
+BUCKETS_MS = (0.1, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+WINDOW = 1024   # har bosqich uchun oxirgi o'lchovlar (rolling)
+
+_lock = threading.Lock()
+_stages = {}
+_counters = {}
+
+
+class _Stage:
+    __slots__ = ("count", "total", "buckets", "recent")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.recent = deque(maxlen=WINDOW)
+
+
+def start():
+    return time.perf_counter() if ENABLED else None
+
+
+def stop(name, t0):
+    if t0 is None:
+        return
+    ms = (time.perf_counter() - t0) * 1000
+    with _lock:
+        s = _stages.get(name)
+        if s is None:
+            s = _stages[name] = _Stage()
+        s.count += 1
+        s.total += ms
+        s.buckets[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        s.recent.append(ms)
+
+
+class stage:
+    """`with metrics.stage("css"): ...` — start()/stop() ning qisqa shakli."""
+
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = start()
+        return self
+
+    def __exit__(self, *exc):
+        stop(self.name, self.t0)
+        return False
+
+
+def inc(name, n=1):
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def _pct(values, p):
+    k = min(len(values) - 1, max(0, round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def snapshot():
+    """Panel uchun: {bosqich: {count, mean, p50, p95, max}} va hisoblagichlar."""
+    with _lock:
+        stages = {name: (s.count, s.total, sorted(s.recent)) for name, s in _stages.items()}
+        counters = dict(_counters)
+    rows = {}
+    for name, (count, total, recent) in sorted(stages.items()):
+        rows[name] = {
+            "count": count,
+            "mean_ms": total / count if count else 0.0,
+            "p50_ms": _pct(recent, 50) if recent else 0.0,
+            "p95_ms": _pct(recent, 95) if recent else 0.0,
+            "max_ms": recent[-1] if recent else 0.0,
+        }
+    return rows, counters
+
+
+def prometheus_text(extra=None, gauges=()):
+    """
+    Prometheus text exposition. `extra` — qo'shimcha qiymatlar ({nom:
+    qiymat}), masalan bank keshi hisoblagichlari; ulardan `gauges` dagi
+    nomlar — gauge, qolganlari — counter (nomiga `_total` qo'shiladi).
+    """
+    with _lock:
+        stages = {name: (s.count, s.total, list(s.buckets)) for name, s in _stages.items()}
+        counters = dict(_counters)
+    out = ["# TYPE testapp_stage_ms histogram"]
+    for name, (count, total, buckets) in sorted(stages.items()):
+        cum = 0
+        for le, n in zip(BUCKETS_MS, buckets):
+            cum += n
+            out.append(f'testapp_stage_ms_bucket{{stage="{name}",le="{le}"}} {cum}')
+        out.append(f'testapp_stage_ms_bucket{{stage="{name}",le="+Inf"}} {count}')
+        out.append(f'testapp_stage_ms_sum{{stage="{name}"}} {total:.3f}')
+        out.append(f'testapp_stage_ms_count{{stage="{name}"}} {count}')
+    for name, value in sorted({**counters, **(extra or {})}.items()):
+        if name in gauges:
+            kind = "gauge"
+        else:
+            kind = "counter"
+            if not name.endswith("_total"):
+                name += "_total"
+        out.append(f"# TYPE testapp_{name} {kind}")
+        out.append(f"testapp_{name} {value}")
+    return "\n".join(out) + "\n"
+
+
+def dump(path, extra=None, gauges=()):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(prometheus_text(extra, gauges))
+    os.replace(tmp, path)
+
+
+_dumper = None
+
+
+def start_dumper(extra_fn=None, gauges=()):
+    """TEST_METRICS_FILE bo'lsa, fon thread'ini bir marta ishga tushiradi."""
+    global _dumper
+    if not ENABLED or not DUMP_FILE or _dumper is not None:
+        return
+    with _lock:
+        if _dumper is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(DUMP_INTERVAL)
+                try:
+                    dump(DUMP_FILE, extra_fn() if extra_fn else None, gauges)
+                except OSError:
+                    pass
+
+        _dumper = threading.Thread(target=loop, name="metrics-dump", daemon=True)
+        _dumper.start()
@@ -0,0 +1,154 @@
+"""
+Savollar bazasi uchun umumiy (process-wide) kesh.
+
+Har bir fan fayli bir marta o'qiladi va barcha sessiyalarga o'zgarmas
+(immutable) ko'rinishda beriladi. Fayl diskda o'zgarsa (mtime yoki hajm),
+keyingi so'rovda qayta yuklanadi.
+
+JSON yonida undan yangiroq `.qbank` (bank_pack.py) bo'lsa, o'sha mmap
+qilinadi va savollar faqat murojaat qilinganda decode qilinadi.
+"""
+import json
+import os
+import threading
+from types import MappingProxyType
+
+_lock = threading.Lock()
+_banks = {}
+_loading = {}   # yo'l -> shu faylni yuklash qulfi
+_stats = {"hits": 0, "misses": 0, "reloads": 0}
+
+
+def unique_options(q):
+    """Variantlar takrorlarsiz; option id — shu tuple'dagi o'rin."""
+    return tuple(dict.fromkeys(q.get("variantlar") or ()))
+
+
+class Bank:
+    """Bitta fan faylining o'zgarmas nusxasi (tuple of read-only dicts)."""
+
+    __slots__ = ("path", "source", "mtime_ns", "size", "questions", "_interned")
+
+    def __init__(self, path, source, mtime_ns, size, questions):
+        self.path = path
+        self.source = source
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.questions = questions
+        self._interned = {}
+
+    def interned(self, i):
+        """
+        i-savolning internlangan ko'rinishi: (options, correct_id).
+        Javoblar satr emas, options ichidagi butun son id sifatida
+        solishtiriladi; `javob` bo'sh yoki variantlarda bo'lmasa correct_id = -1
+        (scoring.ScoringKey bilan bir xil: bunday savolga javob to'g'ri emas).
+        Birinchi murojaatda hisoblanadi va bank bilan birga keshda qoladi.
+        """
+        it = self._interned.get(i)
+        if it is None:
+            q = self.questions[i]
+            opts = unique_options(q)
+            ca = q.get("javob")
+            try:
+                correct = opts.index(ca) if ca not in (None, "") else -1
+            except ValueError:
+                correct = -1
+            it = self._interned[i] = (opts, correct)
+        return it
+
+    def __len__(self):
+        return len(self.questions)
+
+    def __getitem__(self, i):
+        return self.questions[i]
+
+    def __iter__(self):
+        return iter(self.questions)
+
+
+def freeze(obj):
+    if isinstance(obj, dict):
+        return MappingProxyType({k: freeze(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return tuple(freeze(v) for v in obj)
+    return obj
+
+
+def _source(path):
+    """(o'qiladigan fayl, os.stat) — JSON yoki undan yangiroq .qbank."""
+    from bank_pack import packed_path
+    try:
+        pst = os.stat(packed_path(path))
+    except OSError:
+        pst = None
+    try:
+        jst = os.stat(path)
+    except FileNotFoundError:
+        if pst is None:
+            raise
+        jst = None
+    if pst is not None and (jst is None or pst.st_mtime_ns >= jst.st_mtime_ns):
+        return packed_path(path), pst
+    return path, jst
+
+
+def _parse(source):
+    from bank_pack import SUFFIX, PackedBank
+    if source.endswith(SUFFIX):
+        return PackedBank(source)
+    with open(source, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return tuple(freeze(q) for q in data)
+
+
+def _fresh(bank, source, stat):
+    return (bank is not None and bank.source == source
+            and bank.mtime_ns == stat.st_mtime_ns and bank.size == stat.st_size)
+
+
+def get_bank(fname):
+    """
+    Faylni keshdan qaytaradi; kalit — (yo'l, mtime, hajm).
+    FileNotFoundError / json.JSONDecodeError chaqiruvchiga uzatiladi.
+    """
+    path = os.path.abspath(fname)
+    source, stat = _source(path)
+    bank = _banks.get(path)
+    if _fresh(bank, source, stat):
+        with _lock:
+            _stats["hits"] += 1
+        return bank
+
+    # Fayl bo'yicha alohida qulf: bir faylni ikki thread parallel parse
+    # qilmaydi, turli fayllar esa bir-birini kutmaydi (composite.py)
+    with _lock:
+        file_lock = _loading.setdefault(path, threading.Lock())
+    with file_lock:
+        # Boshqa thread shu orada yuklagan bo'lishi mumkin
+        bank = _banks.get(path)
+        if _fresh(bank, source, stat):
+            with _lock:
+                _stats["hits"] += 1
+            return bank
+        questions = _parse(source)
+        bank_new = Bank(path, source, stat.st_mtime_ns, stat.st_size, questions)
+        with _lock:
+            _stats["reloads" if bank is not None else "misses"] += 1
+            _banks[path] = bank_new
+        return bank_new
+
+
+def bank_stats():
+    """Kesh hisoblagichlari: hits / misses / reloads va keshdagi fayllar soni."""
+    with _lock:
+        out = dict(_stats)
+        out["cached"] = len(_banks)
+    return out
+
+
+def clear_cache():
+    with _lock:
+        _banks.clear()
+        for k in _stats:
+            _stats[k] = 0
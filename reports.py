@@ -0,0 +1,273 @@
+"""
+Hisobotlar — fon rejimida (Streamlit rerun'ini bloklamaydi).
+
+    job_id = submit("gradebook", "Diskret.json", "csv")
+    poll(job_id)  ->  {"status": ..., "progress": 0..1, "path": ...}
+
+Hisobot turlari:
+  * gradebook — har bir urinish: talaba, rejim, vaqt, ball, foiz;
+  * items     — savollar tahlili: urinishlar soni, to'g'ri ulushi (p),
+    diskriminatsiya (qolgan ball bilan point-biserial), o'rtacha vaqt,
+    eng ko'p tanlangan noto'g'ri javob.
+
+Tarix bazasi kursor orqali CHUNK qatorlab o'qiladi va natija faylga
+shu zahoti yoziladi — barcha urinishlar xotiraga yuklanmaydi (items
+hisobotida xotira — bank hajmiga proporsional agregatlar).
+
+XLSX uchun openpyxl kerak (write_only rejimi); o'rnatilmagan bo'lsa,
+"xlsx" FORMATS ga kirmaydi va admin panelda taklif qilinmaydi.
+Ishlar jadvali jarayon ichida; fayllar REPORT_DIR papkasida qoladi.
+"""
+import collections
+import csv
+import importlib.util
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import history
+
+REPORT_DIR = os.environ.get("TEST_REPORT_DIR", "reports")
+WORKERS = 2
+CHUNK = 2000
+MAX_JOBS = 50
+FORMATS = ("csv", "xlsx") if importlib.util.find_spec("openpyxl") else ("csv",)
+KINDS = {"gradebook": "Baholar jurnali", "items": "Savollar tahlili"}
+
+_log = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_jobs = collections.OrderedDict()
+_executor = None
+
+
+class Job:
+    __slots__ = ("id", "kind", "subject", "fmt", "status", "done", "total",
+                 "path", "error", "created_at", "finished_at")
+
+    def __init__(self, kind, subject, fmt):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.subject = subject
+        self.fmt = fmt
+        self.status = "navbatda"
+        self.done = 0
+        self.total = 0
+        self.path = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def snapshot(self):
+        with _lock:
+            out = {k: getattr(self, k) for k in self.__slots__}
+        out["progress"] = 1.0 if out["status"] == "tayyor" else (
+            out["done"] / out["total"] if out["total"] else 0.0)
+        return out
+
+
+def _progress(job, done=None, total=None, status=None):
+    with _lock:
+        if done is not None:
+            job.done = done
+        if total is not None:
+            job.total = total
+        if status is not None:
+            job.status = status
+
+
+# ── Yozuvchilar ─────────────────────────────────
+
+class _CsvWriter:
+    def __init__(self, path, header):
+        # utf-8-sig — Excel o'zbekcha harflarni to'g'ri ochishi uchun
+        self._f = open(path, "w", encoding="utf-8-sig", newline="")
+        self._w = csv.writer(self._f)
+        self._w.writerow(header)
+
+    def write(self, row):
+        self._w.writerow(row)
+
+    def close(self):
+        self._f.close()
+
+
+class _XlsxWriter:
+    def __init__(self, path, header):
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise RuntimeError("XLSX uchun openpyxl o'rnatilmagan (pip install openpyxl)")
+        self._path = path
+        self._wb = Workbook(write_only=True)
+        self._ws = self._wb.create_sheet()
+        self._ws.append(header)
+
+    def write(self, row):
+        self._ws.append(row)
+
+    def close(self):
+        self._wb.save(self._path)
+
+
+def _open_writer(path, fmt, header):
+    return (_XlsxWriter if fmt == "xlsx" else _CsvWriter)(path, header)
+
+
+# ── Hisobotlar ──────────────────────────────────
+
+def _ts(v):
+    return datetime.fromtimestamp(v).strftime("%Y-%m-%d %H:%M:%S") if v else ""
+
+
+def _gradebook(job, conn, out):
+    _progress(job, total=conn.execute(
+        "SELECT COUNT(*) FROM attempts WHERE subject = ?", (job.subject,)).fetchone()[0])
+    w = _open_writer(out, job.fmt, ["urinish", "talaba", "rejim", "boshlangan", "tugagan",
+                                    "ball", "jami", "foiz", "vaqt tugagan"])
+    try:
+        cur = conn.execute(
+            "SELECT id, user, mode, started_at, finished_at, score, total, timed_out"
+            " FROM attempts WHERE subject = ? ORDER BY id", (job.subject,))
+        done = 0
+        while True:
+            rows = cur.fetchmany(CHUNK)
+            if not rows:
+                break
+            for a_id, user, mode, started, finished, score, total, timed_out in rows:
+                w.write([a_id, user or "", mode, _ts(started), _ts(finished), score, total,
+                         round(score / total * 100, 1) if total else 0.0,
+                         "ha" if timed_out else ""])
+            done += len(rows)
+            _progress(job, done=done)
+    finally:
+        w.close()
+
+
+def _items(job, conn, out):
+    _progress(job, total=conn.execute(
+        "SELECT COUNT(*) FROM answers a JOIN attempts t ON t.id = a.attempt_id"
+        " WHERE t.subject = ?", (job.subject,)).fetchone()[0])
+    # q_idx -> [n, correct, sum_y, sum_y2, sum_xy, q_id, xato javoblar Counter]
+    agg = {}
+    cur = conn.execute(
+        "SELECT a.q_idx, a.q_id, a.user_answer, a.correct, t.score, t.total"
+        " FROM answers a JOIN attempts t ON t.id = a.attempt_id"
+        " WHERE t.subject = ? ORDER BY a.attempt_id", (job.subject,))
+    done = 0
+    while True:
+        rows = cur.fetchmany(CHUNK)
+        if not rows:
+            break
+        for q_idx, q_id, ua, x, score, total in rows:
+            s = agg.get(q_idx)
+            if s is None:
+                s = agg[q_idx] = [0, 0, 0.0, 0.0, 0.0, q_id, collections.Counter()]
+            y = (score - x) / (total - 1) if total > 1 else 0.0
+            s[0] += 1
+            s[1] += x
+            s[2] += y
+            s[3] += y * y
+            s[4] += x * y
+            if not x and ua is not None:
+                s[6][ua] += 1
+        done += len(rows)
+        _progress(job, done=done)
+
+    times = {}
+    for q_idx, tn, ts in conn.execute(
+            "SELECT q_idx, time_n, time_sum FROM item_stats WHERE subject = ?", (job.subject,)):
+        times[q_idx] = ts / tn if tn else None
+
+    w = _open_writer(out, job.fmt, ["indeks", "id", "urinishlar", "to'g'ri", "p",
+                                    "diskriminatsiya", "o'rtacha vaqt (s)",
+                                    "ko'p tanlangan xato javob", "soni"])
+    try:
+        for q_idx in sorted(agg):
+            n, c, sy, sy2, sxy, q_id, wrong = agg[q_idx]
+            px, my = c / n, sy / n
+            var = px * (1 - px) * (sy2 / n - my * my)
+            disc = (sxy / n - px * my) / math.sqrt(var) if var > 0 else None
+            top = wrong.most_common(1)
+            t = times.get(q_idx)
+            w.write([q_idx, q_id if q_id is not None else "", n, c, round(px, 3),
+                     round(disc, 3) if disc is not None else "",
+                     round(t, 1) if t is not None else "",
+                     top[0][0] if top else "", top[0][1] if top else ""])
+    finally:
+        w.close()
+
+
+_BUILDERS = {"gradebook": _gradebook, "items": _items}
+
+
+def _run(job, db_path):
+    _progress(job, status="ishlamoqda")
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(job.subject))[0]
+    name = f"{stem}_{job.kind}_{datetime.now():%Y%m%d_%H%M%S}_{job.id[:6]}.{job.fmt}"
+    out = os.path.join(REPORT_DIR, name)
+    tmp = out + ".part"
+    try:
+        conn = history.connect(db_path)
+        try:
+            _BUILDERS[job.kind](job, conn, tmp)
+        finally:
+            conn.close()
+        os.replace(tmp, out)
+        with _lock:
+            job.path = out
+            job.status = "tayyor"
+            job.finished_at = time.time()
+    except Exception as e:
+        _log.exception("reports: %s (%s) yaratilmadi", job.kind, job.subject)
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        with _lock:
+            job.error = str(e)
+            job.status = "xato"
+            job.finished_at = time.time()
+
+
+def submit(kind, subject, fmt="csv", db_path=None):
+    """Hisobotni navbatga qo'yadi; ish id'sini (handle) qaytaradi."""
+    global _executor
+    if kind not in _BUILDERS:
+        raise ValueError(f"Noma'lum hisobot turi: {kind!r}")
+    if fmt not in FORMATS:
+        if fmt == "xlsx":
+            raise ValueError("XLSX uchun openpyxl o'rnatilmagan (pip install openpyxl)")
+        raise ValueError(f"Noma'lum format: {fmt!r}")
+    db_path = db_path or history.DB_PATH
+    job = Job(kind, subject, fmt)
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="reports")
+        _jobs[job.id] = job
+        while len(_jobs) > MAX_JOBS:
+            _jobs.popitem(last=False)
+    if not os.path.exists(db_path):
+        with _lock:
+            job.status, job.error = "xato", "Tarix bazasi hali yaratilmagan"
+        return job.id
+    _executor.submit(_run, job, db_path)
+    return job.id
+
+
+def poll(job_id):
+    """Ish holati (dict) yoki None — bunday ish yo'q."""
+    with _lock:
+        job = _jobs.get(job_id)
+    return job.snapshot() if job is not None else None
+
+
+def active(job_ids):
+    """Berilgan ishlardan hali tugamaganlari bormi."""
+    return any((poll(j) or {}).get("status") in ("navbatda", "ishlamoqda") for j in job_ids)
@@ -0,0 +1,129 @@
+"""
+Takrorlash (spaced repetition) rejimi — SM-2 rejalashtiruvchisi.
+
+Har bir (talaba, fan, savol) uchun holat history bazasidagi `review`
+jadvalida: ease, interval (kun), ketma-ket to'g'ri javoblar, xatolar
+soni va `due` — keyingi takrorlash vaqti. (user, subject, due) indeksi
+ustuvor navbat vazifasini bajaradi: navbatdagi blok uchun muddati
+kelgan k ta savol B-daraxtdan O(k log n) da olinadi, tarix skan
+qilinmaydi. Yetmasa — yangi savollar pick_questions() orqali
+(rejalashtirilganlari PK bo'yicha tekshirib o'tkazib yuboriladi),
+undan keyin muddati eng yaqinlari ("oldinroq takrorlash").
+
+Holat urinish yozilganda history writer thread'ida yangilanadi —
+kirish nuqtalari (streamlit_app, api) install() ni chaqiradi, shunda
+barcha rejimlardagi javoblar hisobga olinadi.
+"""
+import logging
+import os
+import sqlite3
+import time
+
+import history
+from exam import pick_questions
+
+RELEARN = 10 * 60       # xato javobdan keyin qayta ko'rsatish (soniya)
+DAY = 24 * 3600
+MIN_EASE = 1.3
+START_EASE = 2.5
+Q_CORRECT, Q_WRONG = 4, 1   # SM-2 sifat bahosi (0..5)
+
+_log = logging.getLogger(__name__)
+
+
+def sm2(ease, interval, reps, quality):
+    """SM-2 qadam: (ease, interval kun, reps) -> yangi qiymatlar va kechikish (soniya)."""
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    if quality < 3:
+        return ease, 0.0, 0, RELEARN
+    reps += 1
+    if reps == 1:
+        interval = 1.0
+    elif reps == 2:
+        interval = 6.0
+    else:
+        interval = max(1.0, round(interval * ease, 2))
+    return ease, interval, reps, interval * DAY
+
+
+def _update(conn, a):
+    """history hook: urinishdagi har bir javob berilgan savol uchun SM-2 qadami."""
+    user = a.get("user")
+    if not user:
+        return
+    now = a["finished_at"]
+    for ans in a["answers"]:
+        if ans.get("user") is None:
+            continue
+        row = conn.execute(
+            "SELECT ease, interval, reps FROM review WHERE user = ? AND subject = ? AND q_idx = ?",
+            (user, a["subject"], ans["q_idx"])).fetchone()
+        ease, interval, reps = row or (START_EASE, 0.0, 0)
+        ok = bool(ans["correct"])
+        ease, interval, reps, delay = sm2(ease, interval, reps, Q_CORRECT if ok else Q_WRONG)
+        conn.execute(
+            "INSERT INTO review (user, subject, q_idx, ease, interval, reps, lapses, due)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (user, subject, q_idx) DO UPDATE SET"
+            " ease = excluded.ease, interval = excluded.interval, reps = excluded.reps,"
+            " lapses = lapses + excluded.lapses, due = excluded.due",
+            (user, a["subject"], ans["q_idx"], ease, interval, reps, int(not ok), now + delay))
+
+
+def install():
+    """SM-2 yangilanishini history writer'iga ulaydi (takroriy chaqiruv — no-op)."""
+    history.add_hook(_update)
+
+
+def next_block(user, subject, bank, n, rng=None, clusters=None, now=None):
+    """
+    Takrorlash bloki: (indekslar, muddati kelganlar soni).
+    Tartib: muddati kelganlar (eng eskisi birinchi) -> yangi savollar ->
+    muddati hali kelmaganlar (eng yaqini birinchi).
+    Indeks qanday bo'lsa shunday o'qiladi (writer kutilmaydi): hali navbatda
+    turgan oxirgi urinish keyingi blokda hisobga olinadi.
+    """
+    now = now or time.time()
+    n = min(n, len(bank))
+    if not user or not os.path.exists(history.DB_PATH):
+        return _new_items(None, user, subject, bank, n, [], rng, clusters), 0
+    try:
+        conn = sqlite3.connect(history.DB_PATH, timeout=5)
+    except sqlite3.Error:
+        _log.exception("review: baza ochilmadi")
+        return _new_items(None, user, subject, bank, n, [], rng, clusters), 0
+    try:
+        chosen = [r[0] for r in conn.execute(
+            "SELECT q_idx FROM review WHERE user = ? AND subject = ? AND due <= ?"
+            " ORDER BY due LIMIT ?", (user, subject, now, n)) if r[0] < len(bank)]
+        n_due = len(chosen)
+        if len(chosen) < n:
+            chosen = _new_items(conn, user, subject, bank, n, chosen, rng, clusters)
+        if len(chosen) < n:
+            taken = set(chosen)
+            for (i,) in conn.execute(
+                    "SELECT q_idx FROM review WHERE user = ? AND subject = ? AND due > ?"
+                    " ORDER BY due LIMIT ?", (user, subject, now, n)):
+                if len(chosen) >= n:
+                    break
+                if i not in taken and i < len(bank):
+                    chosen.append(i)
+    finally:
+        conn.close()
+    return chosen, n_due
+
+
+def _new_items(conn, user, subject, bank, n, chosen, rng, clusters):
+    # Yangi savollar pick_questions() orqali; rejalashtirilganlari va
+    # tanlangan savollar klasterlari PK/to'plam bo'yicha o'tkazib yuboriladi
+    taken = set(chosen)
+    used = {clusters[i] for i in chosen if clusters and clusters.get(i) is not None}
+
+    def skip(i):
+        if i in taken or (used and clusters.get(i) in used):
+            return True
+        return conn is not None and conn.execute(
+            "SELECT 1 FROM review WHERE user = ? AND subject = ? AND q_idx = ?",
+            (user, subject, i)).fetchone() is not None
+
+    return list(chosen) + pick_questions(bank, (), n - len(chosen), rng, clusters, skip)
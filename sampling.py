@@ -0,0 +1,77 @@
+"""
+Og'irlikli tanlash (weighted sampling without replacement).
+
+pick_indices() — pick_questions() uchun: og'irliklar faqat ikki xil
+(yangi savol = 1, oldingi testda chiqqan = PREV_WEIGHT). Har qadamda avval
+sinf (yangi / oldingi) qolgan umumiy og'irlikka proporsional tanlanadi,
+keyin sinf ichidan tekis tasodifiy element olinadi. Bu oldingi ketma-ket
+kumulyativ skan bilan aynan bir xil taqsimot, lekin kutilgan vaqt
+O(k + |prev|) — butun pool (n) har tanlovda aylanib chiqilmaydi.
+
+iter_indices() — xuddi shu tanlov, lekin generator (savollarni tashlab
+o'tish mumkin — klasterlar uchun).
+"""
+import itertools
+import random
+
+PREV_WEIGHT = 0.33   # oldingi testda chiqqan savollar ~3x kamroq
+
+
+def _pop_random(items, rng):
+    # O(1): tasodifiy elementni oxirgisi bilan almashtirib olib tashlaymiz
+    j = rng.randrange(len(items))
+    items[j], items[-1] = items[-1], items[j]
+    return items.pop()
+
+
+def iter_indices(total, prev_indices, rng=None, prev_weight=PREV_WEIGHT):
+    """
+    pick_indices() ning dangasa (lazy) shakli: savollarni og'irlikli
+    tasodifiy tartibda birma-bir beradi. Chaqiruvchi ba'zilarini tashlab
+    yuborsa ham (masalan, bir klaster a'zolari), qolganlar orasidagi
+    taqsimot o'zgarmaydi.
+    """
+    rng = rng or random
+    prev = {i for i in (prev_indices or ()) if 0 <= i < total}
+
+    fresh_left = total - len(prev)
+    prev_left = len(prev)
+    fresh_list = prev_list = None
+    taken = set()
+
+    while True:
+        w_fresh = fresh_left
+        w_prev = prev_left * prev_weight
+        if w_fresh + w_prev <= 0:
+            return
+
+        if rng.random() * (w_fresh + w_prev) < w_fresh:
+            if fresh_list is None and fresh_left * 2 >= total:
+                # Yangi savollar ko'p — rejection sampling, ro'yxat kerak emas
+                while True:
+                    i = rng.randrange(total)
+                    if i not in prev and i not in taken:
+                        break
+            else:
+                if fresh_list is None:
+                    fresh_list = [i for i in range(total) if i not in prev and i not in taken]
+                i = _pop_random(fresh_list, rng)
+            fresh_left -= 1
+        else:
+            if prev_list is None:
+                prev_list = [i for i in prev if i not in taken]
+            i = _pop_random(prev_list, rng)
+            prev_left -= 1
+
+        taken.add(i)
+        yield i
+
+
+def pick_indices(total, prev_indices, n, rng=None, prev_weight=PREV_WEIGHT):
+    """
+    `total` ta savoldan n tasini tanlaydi; `prev_indices` dagilar
+    `prev_weight` og'irlik bilan. Bir testda takrorlanmaydi.
+    `rng` — random.Random (seed bilan takrorlanadigan natija uchun).
+    """
+    return list(itertools.islice(iter_indices(total, prev_indices, rng, prev_weight),
+                                 max(0, min(n, total))))
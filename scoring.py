@@ -0,0 +1,259 @@
+"""
+Vektorlashtirilgan baholash (NumPy).
+
+Savollar bloki ustunli kalitga aylantiriladi: to'g'ri javob id massivi
+(multiple_choice) va son/tolerance massivlari (calculation). Javoblar ham
+id / son massivlariga kodlanadi, so'ng bitta urinish yoki butun to'plam
+bitta NumPy o'tishida baholanadi.
+
+Natijalar streamlit_app.evaluate() ning eski (savolma-savol) mantiqi bilan
+aynan bir xil:
+  * multiple_choice — javob bo'sh bo'lmasa, `javob` satriga tengmi;
+  * calculation — son, to_g_ri_javob va tolerance (default 0.01) float'ga
+    o'girilsa va |u - c| <= tol bo'lsa to'g'ri; aks holda xato.
+
+Qayta baholash (javob yoki tolerance tuzatilganda):
+    python scoring.py regrade Diskret.json
+"""
+import math
+import sqlite3
+import sys
+
+import numpy as np
+
+MISSING = -1    # javob berilmagan
+UNKNOWN = -2    # javob variantlar orasida yo'q
+
+_KIND_MC = 0
+_KIND_CALC = 1
+
+
+def _to_float(v):
+    try:
+        return float(v)
+    except Exception:
+        return math.nan
+
+
+def _parses(v):
+    try:
+        float(v)
+        return True
+    except Exception:
+        return False
+
+
+class ScoringKey:
+    """
+    Savollar ro'yxati uchun ustunli kalit.
+    `labels[j]` — j-savol uchun {satr: id}; to'g'ri javob ham shu lug'atda
+    (variantlar orasida bo'lmasa ham), shuning uchun id tengligi satr
+    tengligiga teng kuchli.
+    """
+
+    __slots__ = ("questions", "kind", "correct_id", "correct_val", "tol", "key_ok",
+                 "labels", "options")
+
+    def __init__(self, questions):
+        n = len(questions)
+        self.questions = questions
+        self.kind = np.zeros(n, dtype=np.int8)
+        self.correct_id = np.full(n, MISSING, dtype=np.int32)
+        self.correct_val = np.full(n, math.nan)
+        self.tol = np.full(n, math.nan)
+        self.key_ok = np.zeros(n, dtype=bool)
+        self.labels = []
+        self.options = []
+        for j, q in enumerate(questions):
+            if q.get("type") == "calculation":
+                self.kind[j] = _KIND_CALC
+                self.correct_val[j] = _to_float(q.get("to_g_ri_javob"))
+                self.tol[j] = _to_float(q.get("tolerance", 0.01))
+                self.key_ok[j] = _parses(q.get("to_g_ri_javob")) and _parses(q.get("tolerance", 0.01))
+                self.labels.append(None)
+                self.options.append(())
+                continue
+            labels = {}
+            for v in q.get("variantlar") or ():
+                labels.setdefault(v, len(labels))
+            ca = q.get("javob")
+            if ca not in (None, ""):
+                try:
+                    self.correct_id[j] = labels.setdefault(ca, len(labels))
+                except TypeError:
+                    pass
+            self.labels.append(labels)
+            self.options.append(tuple(labels))
+
+    def __len__(self):
+        return len(self.questions)
+
+    def encode(self, answers, positions=None):
+        """
+        Javoblar (xom qiymatlar) -> (ids, vals). `positions[k]` — k-javob
+        qaysi savolga tegishli (default: 0..n-1).
+        """
+        if positions is None:
+            positions = range(len(answers))
+        m = len(answers)
+        ids = np.full(m, MISSING, dtype=np.int32)
+        vals = np.full(m, math.nan)
+        for k, (j, ua) in enumerate(zip(positions, answers)):
+            if ua in (None, ""):
+                continue
+            if self.kind[j] == _KIND_CALC:
+                vals[k] = _to_float(ua)
+            else:
+                try:
+                    ids[k] = self.labels[j].get(ua, UNKNOWN)
+                except TypeError:
+                    ids[k] = UNKNOWN
+        return ids, vals
+
+    def encode_ids(self, answers):
+        """
+        Internlangan javoblar (question_bank.Bank.interned): multiple_choice
+        uchun option id (int), calculation uchun son. Satr solishtirish yo'q.
+        """
+        m = len(answers)
+        ids = np.full(m, MISSING, dtype=np.int32)
+        vals = np.full(m, math.nan)
+        for j, ua in enumerate(answers):
+            if ua in (None, ""):
+                continue
+            if self.kind[j] == _KIND_CALC:
+                vals[j] = _to_float(ua)
+            elif isinstance(ua, int) and 0 <= ua < len(self.options[j]):
+                ids[j] = ua
+            else:
+                ids[j] = UNKNOWN
+        return ids, vals
+
+    def grade(self, ids, vals, positions=None):
+        """
+        Bitta NumPy o'tishi: ids/vals istalgan shakldagi massivlar
+        (masalan, urinishlar x savollar). `positions` berilmasa, oxirgi
+        o'q savollar tartibida deb olinadi.
+        """
+        if positions is None:
+            positions = np.arange(len(self.questions))
+        kind = self.kind[positions]
+        with np.errstate(invalid="ignore"):
+            calc_ok = np.abs(vals - self.correct_val[positions]) <= self.tol[positions]
+        mc_ok = (ids >= 0) & (ids == self.correct_id[positions])
+        return np.where(kind == _KIND_CALC, calc_ok, mc_ok)
+
+
+def evaluate_answers(questions, answers, key=None, as_ids=False):
+    """
+    evaluate() bilan bir xil natija: (score, results).
+    `answers[i]` — i-savolga foydalanuvchi javobi (yoki None).
+    as_ids=True — multiple_choice javoblari option id; natijadagi "user"
+    baribir matn ko'rinishida qaytadi.
+    """
+    key = key or ScoringKey(questions)
+    ids, vals = key.encode_ids(answers) if as_ids else key.encode(answers)
+    ok = key.grade(ids, vals)
+
+    results = []
+    for j, (q, ua) in enumerate(zip(questions, answers)):
+        correct = bool(ok[j])
+        if key.kind[j] == _KIND_CALC:
+            # eski evaluate(): biror float() xato bersa — xom qiymat
+            parsed = key.key_ok[j] and (ua in (None, "") or _parses(ua))
+            answer = float(key.correct_val[j]) if parsed else q.get("to_g_ri_javob")
+        else:
+            answer = q.get("javob")
+            if as_ids and ids[j] >= 0:
+                ua = key.options[j][ids[j]]
+        results.append({"correct": correct, "user": ua, "answer": answer})
+    return int(ok.sum()), results
+
+
+def grade_batch(key, answer_rows):
+    """
+    Ko'p urinishni bir o'tishda baholaydi. `answer_rows` — har biri
+    len(key) uzunlikdagi javoblar ro'yxati. (correct matritsa, ballar).
+    """
+    n = len(key)
+    ids = np.full((len(answer_rows), n), MISSING, dtype=np.int32)
+    vals = np.full((len(answer_rows), n), math.nan)
+    for r, row in enumerate(answer_rows):
+        ids[r], vals[r] = key.encode(row)
+    ok = key.grade(ids, vals)
+    return ok, ok.sum(axis=1)
+
+
+def regrade(db_path, subject, bank, chunk=5000):
+    """
+    Tarixdagi `subject` urinishlarini joriy bank bo'yicha qayta baholaydi.
+    answers.correct va attempts.score faqat o'zgargan joylarda yangilanadi.
+    Qaytaradi: (o'zgargan javoblar, o'zgargan urinishlar).
+    """
+    key = ScoringKey(bank)
+    n_bank = len(bank)
+    changed_answers = changed_attempts = 0
+    if not n_bank:
+        return changed_answers, changed_attempts
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        last_id = 0
+        while True:
+            attempt_ids = [r[0] for r in conn.execute(
+                "SELECT id FROM attempts WHERE subject = ? AND id > ? ORDER BY id LIMIT ?",
+                (subject, last_id, chunk))]
+            if not attempt_ids:
+                break
+            last_id = attempt_ids[-1]
+            rows = conn.execute(
+                "SELECT attempt_id, pos, q_idx, user_answer, correct FROM answers"
+                " WHERE attempt_id BETWEEN ? AND ? AND attempt_id IN"
+                " (SELECT id FROM attempts WHERE subject = ?)",
+                (attempt_ids[0], last_id, subject)).fetchall()
+            if not rows:
+                continue
+
+            att = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+            q_idx = np.fromiter((r[2] for r in rows), dtype=np.int64, count=len(rows))
+            old = np.fromiter((r[4] for r in rows), dtype=np.int8, count=len(rows))
+            # Bankdan tashqaridagi (o'chirilgan) savollar — eski baho qoladi
+            valid = (q_idx >= 0) & (q_idx < n_bank)
+            pos = np.where(valid, q_idx, 0)
+            ids, vals = key.encode([r[3] for r in rows], pos)
+            new = np.where(valid, key.grade(ids, vals, pos), old).astype(np.int8)
+
+            diff = np.nonzero(new != old)[0]
+            uniq, inv = np.unique(att, return_inverse=True)
+            old_scores = np.bincount(inv, weights=old, minlength=len(uniq))
+            new_scores = np.bincount(inv, weights=new, minlength=len(uniq))
+            moved = np.nonzero(old_scores != new_scores)[0]
+
+            with conn:
+                conn.executemany(
+                    "UPDATE answers SET correct = ? WHERE attempt_id = ? AND pos = ?",
+                    [(int(new[k]), rows[k][0], rows[k][1]) for k in diff])
+                conn.executemany(
+                    "UPDATE attempts SET score = ? WHERE id = ?",
+                    [(int(new_scores[k]), int(uniq[k])) for k in moved])
+            changed_answers += len(diff)
+            changed_attempts += len(moved)
+    finally:
+        conn.close()
+    return changed_answers, changed_attempts
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != "regrade":
+        print("Foydalanish: python scoring.py regrade FAN.json [FAN.json ...]")
+        sys.exit(2)
+    import history
+    from question_bank import get_bank
+    for fname in sys.argv[2:]:
+        a, t = regrade(history.DB_PATH, fname, get_bank(fname).questions)
+        print(f"{fname}: {a} ta javob, {t} ta urinish qayta baholandi")
+        if a:
+            conn = history.connect()
+            try:
+                history.rebuild_item_stats(conn, fname)
+            finally:
+                conn.close()
@@ -0,0 +1,174 @@
+"""
+Savollar banki bo'yicha to'liq matnli qidiruv (inverted index).
+
+Indeks `savol` va `variantlar` matnidan bir marta quriladi va bank bilan
+birga yashaydi: fayl o'zgarib get_bank() yangi Bank qaytarsa, indeks
+ham qayta quriladi.
+
+Normalizatsiya: kichik harf (casefold), o'zbekcha tutuq belgisining
+barcha shakllari (’ ‘ ʻ ʼ ` ') olib tashlanadi — "tarmog‘i", "tarmog'i"
+va "tarmogi" bir xil token.
+
+So'rov tokenlari AND bilan birlashtiriladi; har bir token uchun:
+aniq moslik > prefiks (lug'atda bisect) > fuzzy (trigramlar bo'yicha
+nomzodlar + Levenshtein, 1-2 tahrir).
+"""
+import bisect
+import os
+import re
+import threading
+from array import array
+
+from question_bank import get_bank
+
+_APOSTROPHES = str.maketrans("", "", "'`‘’ʻʼ′")
+_TOKEN_RE = re.compile(r"\w+")
+
+W_EXACT, W_PREFIX, W_FUZZY = 3, 2, 1
+W_SAVOL = 2     # savol matnidagi moslik variantdagidan ustun
+MIN_PREFIX = 2
+
+
+def normalize(text):
+    return str(text).casefold().translate(_APOSTROPHES)
+
+
+def tokens(text):
+    return _TOKEN_RE.findall(normalize(text))
+
+
+def _trigrams(term):
+    t = f"^{term}$"
+    return {t[i:i + 3] for i in range(len(t) - 2)}
+
+
+def _within(a, b, k):
+    """Levenshtein(a, b) <= k (qator minimumi k dan oshsa — erta chiqish)."""
+    if abs(len(a) - len(b)) > k:
+        return False
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        if min(cur) > k:
+            return False
+        prev = cur
+    return prev[-1] <= k
+
+
+def max_edits(term):
+    return 0 if len(term) < 4 else (1 if len(term) < 8 else 2)
+
+
+class SearchIndex:
+    """Bitta bank uchun indeks. Hujjat — savolning bankdagi indeksi."""
+
+    __slots__ = ("bank", "vocab", "postings", "in_savol", "trigrams")
+
+    def __init__(self, bank):
+        self.bank = bank
+        postings, in_savol = {}, {}
+        for i, q in enumerate(bank):
+            savol_terms = set(tokens(q.get("savol", "")))
+            terms = set(savol_terms)
+            for v in q.get("variantlar") or ():
+                terms.update(tokens(v))
+            for t in terms:
+                postings.setdefault(t, []).append(i)
+            for t in savol_terms:
+                in_savol.setdefault(t, []).append(i)
+        self.vocab = sorted(postings)
+        self.postings = {t: array("i", p) for t, p in postings.items()}
+        self.in_savol = {t: frozenset(p) for t, p in in_savol.items()}
+        trigrams = {}
+        for tid, t in enumerate(self.vocab):
+            for g in _trigrams(t):
+                trigrams.setdefault(g, []).append(tid)
+        self.trigrams = {g: array("i", ids) for g, ids in trigrams.items()}
+
+    def prefix_terms(self, prefix):
+        lo = bisect.bisect_left(self.vocab, prefix)
+        hi = bisect.bisect_left(self.vocab, prefix + "\U0010ffff")
+        return self.vocab[lo:hi]
+
+    def fuzzy_terms(self, term):
+        k = max_edits(term)
+        if not k:
+            return []
+        grams = _trigrams(term)
+        counts = {}
+        for g in grams:
+            for tid in self.trigrams.get(g, ()):
+                counts[tid] = counts.get(tid, 0) + 1
+        # k ta tahrir ko'pi bilan 3k trigramni buzadi
+        need = max(1, len(grams) - 3 * k)
+        return [self.vocab[tid] for tid, c in counts.items()
+                if c >= need and _within(term, self.vocab[tid], k)]
+
+    def expand(self, term, prefix=True, fuzzy=True):
+        """token -> [(lug'at termini, og'irlik)]."""
+        out = {}
+        if prefix and len(term) >= MIN_PREFIX:
+            for t in self.prefix_terms(term):
+                out[t] = W_PREFIX
+        if term in self.postings:
+            out[term] = W_EXACT
+        if fuzzy and not out:
+            for t in self.fuzzy_terms(term):
+                out[t] = W_FUZZY
+        return out.items()
+
+    def search(self, query, limit=100, prefix=True, fuzzy=True):
+        """[(ball, savol indeksi)] — ball bo'yicha kamayish tartibida."""
+        q_terms = list(dict.fromkeys(tokens(query)))
+        if not q_terms:
+            return []
+        per_term = []
+        for qt in q_terms:
+            scores = {}
+            for t, w in self.expand(qt, prefix, fuzzy):
+                savol = self.in_savol.get(t, ())
+                for i in self.postings[t]:
+                    s = w * W_SAVOL if i in savol else w
+                    if s > scores.get(i, 0):
+                        scores[i] = s
+            if not scores:
+                return []
+            per_term.append(scores)
+        per_term.sort(key=len)
+        total = dict(per_term[0])
+        for scores in per_term[1:]:
+            total = {i: s + scores[i] for i, s in total.items() if i in scores}
+            if not total:
+                return []
+        ranked = sorted(total.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]
+        return [(s, i) for i, s in ranked]
+
+
+_lock = threading.Lock()
+_indexes = {}   # abspath -> SearchIndex
+
+
+def get_index(fname):
+    """Bank uchun indeks; bank qayta yuklangan bo'lsa — qayta quriladi."""
+    bank = get_bank(fname)
+    key = os.path.abspath(fname)
+    with _lock:
+        idx = _indexes.get(key)
+        if idx is not None and idx.bank is bank:
+            return idx
+    idx = SearchIndex(bank)
+    with _lock:
+        _indexes[key] = idx
+    return idx
+
+
+def search_banks(fnames, query, limit=100, prefix=True, fuzzy=True):
+    """Bir nechta bank bo'yicha: [(ball, fayl, savol indeksi)]."""
+    hits = []
+    for fname in fnames:
+        idx = get_index(fname)
+        hits.extend((s, fname, i) for s, i in idx.search(query, limit, prefix, fuzzy))
+    hits.sort(key=lambda h: -h[0])
+    return hits[:limit]
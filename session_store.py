@@ -0,0 +1,306 @@
+"""
+Test sessiyasi holatini jarayondan tashqarida saqlash (checkpoint).
+
+Bir nechta server jarayoni (worker) load balancer ortida ishlashi va
+restart paytida ham boshlangan testlar yo'qolmasligi uchun minimal holat —
+bank indekslari, variant permutatsiyalari, javoblar va deadline —
+tashqi omborga yoziladi. Sessiya URL'dagi `?sid=...` orqali istalgan
+worker'da tiklanadi; savollarning o'zi umumiy bankdan (question_bank)
+olinadi, omborga yozilmaydi.
+
+Ombor TEST_SESSION_STORE orqali tanlanadi:
+    sqlite:sessions.db   (default)
+    file:.sessions       (har sessiya — alohida JSON fayl)
+    none                 (o'chirilgan)
+Boshqa backend'lar register_backend() bilan qo'shiladi. Muddati o'tgan
+checkpoint'lar ombor ochilganda va keyin har PRUNE_INTERVAL da tozalanadi.
+
+Ilova checkpoint'larni CheckpointWriter orqali yozadi (get_writer()):
+javob berish diskni kutmaydi, bir sid uchun navbatda faqat oxirgi holat
+qoladi (coalesce). Shu jarayonda hali yozilmagan holat load() da ko'rinadi.
+"""
+import atexit
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from array import array
+
+FORMAT_VERSION = 1
+TTL = 24 * 3600     # deadline'dan keyin checkpoint qancha saqlanadi (soniya)
+PRUNE_INTERVAL = 3600
+
+_log = logging.getLogger(__name__)
+
+_SID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+def valid_sid(sid):
+    return isinstance(sid, str) and bool(_SID_RE.match(sid))
+
+
+class SessionStore(ABC):
+    """Backend interfeysi: sid -> JSON satr (pack() natijasi)."""
+
+    @abstractmethod
+    def load(self, sid):
+        ...
+
+    @abstractmethod
+    def save(self, sid, data, expires_at):
+        ...
+
+    @abstractmethod
+    def delete(self, sid):
+        ...
+
+    @abstractmethod
+    def prune(self, now=None):
+        """Muddati o'tgan checkpoint'larni o'chiradi."""
+
+
+class SQLiteStore(SessionStore):
+    _SCHEMA = ("CREATE TABLE IF NOT EXISTS sessions ("
+               " sid TEXT PRIMARY KEY, expires_at REAL NOT NULL, data TEXT NOT NULL)")
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(self._SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def load(self, sid):
+        row = self._conn().execute(
+            "SELECT data FROM sessions WHERE sid = ? AND expires_at > ?",
+            (sid, time.time())).fetchone()
+        return row[0] if row else None
+
+    def save(self, sid, data, expires_at):
+        with self._conn() as conn:
+            conn.execute("INSERT OR REPLACE INTO sessions (sid, expires_at, data) VALUES (?, ?, ?)",
+                         (sid, expires_at, data))
+
+    def delete(self, sid):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def prune(self, now=None):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now or time.time(),))
+
+
+class FileStore(SessionStore):
+    """Har sessiya — `folder/<sid>.json` ({"expires_at", "data"}), atomik yoziladi."""
+
+    def __init__(self, folder):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def _path(self, sid):
+        return os.path.join(self.folder, sid + ".json")
+
+    def load(self, sid):
+        try:
+            with open(self._path(sid), "r", encoding="utf-8") as f:
+                rec = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return rec["data"] if rec.get("expires_at", 0) > time.time() else None
+
+    def save(self, sid, data, expires_at):
+        path = self._path(sid)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"expires_at": expires_at, "data": data}, f)
+        os.replace(tmp, path)
+
+    def delete(self, sid):
+        try:
+            os.remove(self._path(sid))
+        except FileNotFoundError:
+            pass
+
+    def prune(self, now=None):
+        now = now or time.time()
+        for name in os.listdir(self.folder):
+            if not name.endswith(".json"):
+                continue
+            sid = name[:-5]
+            if valid_sid(sid) and self.load(sid) is None:
+                self.delete(sid)
+
+
+BACKENDS = {"sqlite": SQLiteStore, "file": FileStore}
+
+
+def register_backend(scheme, factory):
+    """factory(arg) -> SessionStore; TEST_SESSION_STORE="<scheme>:<arg>"."""
+    BACKENDS[scheme] = factory
+
+
+_store = None
+_store_lock = threading.Lock()
+_pruned_at = 0.0
+
+
+def _maybe_prune(store):
+    # Ko'pi bilan PRUNE_INTERVAL da bir marta (birinchisi — ombor ochilganda)
+    global _pruned_at
+    now = time.time()
+    with _store_lock:
+        if now - _pruned_at < PRUNE_INTERVAL:
+            return
+        _pruned_at = now
+    try:
+        store.prune(now)
+    except (OSError, sqlite3.Error):
+        _log.exception("session_store: eski checkpoint'lar tozalanmadi")
+
+
+def get_store():
+    """TEST_SESSION_STORE bo'yicha yagona ombor; "none" bo'lsa — None."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                spec = os.environ.get("TEST_SESSION_STORE", "sqlite:sessions.db")
+                scheme, _, arg = spec.partition(":")
+                if scheme == "none":
+                    _store = False
+                elif scheme not in BACKENDS:
+                    raise ValueError(f"Noma'lum TEST_SESSION_STORE: {spec!r}")
+                else:
+                    _store = BACKENDS[scheme](arg)
+    if _store:
+        _maybe_prune(_store)
+    return _store or None
+
+
+class CheckpointWriter:
+    """Checkpoint'larni fon thread'ida yozadi; har sid uchun faqat oxirgisi."""
+
+    def __init__(self, store):
+        self.store = store
+        self._cond = threading.Condition()
+        self._pending = {}      # sid -> (data, expires_at) yoki None (o'chirish)
+        self._inflight = {}     # hozir yozilayotganlar
+        self._thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, sid, data, expires_at):
+        with self._cond:
+            self._pending[sid] = (data, expires_at)
+            self._cond.notify_all()
+
+    def delete(self, sid):
+        # Navbatdagi save'dan keyin bajariladi — checkpoint qayta tirilmaydi
+        with self._cond:
+            self._pending[sid] = None
+            self._cond.notify_all()
+
+    def load(self, sid):
+        """Navbatdagi (hali yozilmagan) holat, bo'lmasa — ombordagi."""
+        with self._cond:
+            for queued in (self._pending, self._inflight):
+                if sid in queued:
+                    rec = queued[sid]
+                    return rec[0] if rec else None
+        return self.store.load(sid)
+
+    def flush(self, timeout=None):
+        """Navbat bo'shab, hammasi yozilguncha kutadi."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._inflight, timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+                self._inflight, self._pending = self._pending, {}
+            for sid, rec in self._inflight.items():
+                try:
+                    if rec is None:
+                        self.store.delete(sid)
+                    else:
+                        self.store.save(sid, *rec)
+                except Exception:  # noqa: BLE001 — writer thread to'xtamasligi kerak
+                    _log.exception("session_store: %s checkpoint'i yozilmadi", sid)
+            with self._cond:
+                self._inflight = {}
+                self._cond.notify_all()
+
+
+_writer = None
+
+
+def get_writer():
+    """get_store() uchun yagona CheckpointWriter; ombor o'chirilgan bo'lsa — None."""
+    global _writer
+    store = get_store()
+    if store is None:
+        return None
+    if _writer is None:
+        with _store_lock:
+            if _writer is None:
+                _writer = CheckpointWriter(store)
+                atexit.register(_writer.flush, 5)
+    return _writer
+
+
+# ── Serializatsiya ──────────────────────────────
+
+def _pack_perm(p):
+    if p is None:
+        return None
+    return p.hex() if isinstance(p, bytes) else list(p)
+
+
+def _unpack_perm(p):
+    if p is None:
+        return None
+    return bytes.fromhex(p) if isinstance(p, str) else tuple(p)
+
+
+def pack(sess):
+    """
+    Sessiya lug'ati -> ixcham JSON. Kutilgan maydonlar: subject, mode,
+    answer_mode, page_size, bank_sha, indices, perms, answers {pos: qiymat},
+    answer_times, t_start, t_end (unix vaqt), started, finished, page, prev.
+    perms=None — permutatsiyalar seed'dan qayta tiklanadi (exam.seed_key).
+    """
+    rec = dict(sess)
+    rec["v"] = FORMAT_VERSION
+    rec["indices"] = list(sess["indices"])
+    if sess.get("perms") is not None:
+        rec["perms"] = [_pack_perm(p) for p in sess["perms"]]
+    rec["prev"] = sorted(sess.get("prev") or ())
+    return json.dumps(rec, separators=(",", ":"))
+
+
+def unpack(data):
+    """pack() ga teskari; format mos kelmasa — None."""
+    try:
+        rec = json.loads(data)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(rec, dict) or rec.get("v") != FORMAT_VERSION:
+        return None
+    rec["indices"] = array("i", rec["indices"])
+    if rec.get("perms") is not None:
+        rec["perms"] = [_unpack_perm(p) for p in rec["perms"]]
+    rec["answers"] = {int(k): v for k, v in rec.get("answers", {}).items()}
+    rec["answer_times"] = {int(k): v for k, v in rec.get("answer_times", {}).items()}
+    rec["prev"] = set(rec.get("prev", ()))
+    return rec
@@ -1,281 +1,119 @@
 import streamlit as st
+import hmac
 import json
 import random
 import math
 import os
-from datetime import datetime, timedelta
 import time
+import uuid
+from datetime import datetime, timedelta
 
-st.set_page_config(page_title="Test Ilovasi", page_icon="🧠", layout="wide")
-
-# ══════════════════════════════════════════════
-# CSS — Terminal/hacker dark aesthetic
-# ══════════════════════════════════════════════
-st.markdown("""
-<style>
-@import url('https://fonts.googleapis.com/css2?family=JetBrains+Mono:wght@300;400;600;700&family=Rajdhani:wght@400;500;600;700&display=swap');
-
-*, html, body { box-sizing: border-box; }
-
-html, body, [class*="css"] {
-    font-family: 'Rajdhani', sans-serif !important;
-    background: #080c0f !important;
-    color: #c9d1d9 !important;
-}
-
-/* ── Sidebar ── */
-section[data-testid="stSidebar"] {
-    background: #0d1117 !important;
-    border-right: 1px solid #1e2a35 !important;
-}
-section[data-testid="stSidebar"] * { color: #8b949e !important; }
-section[data-testid="stSidebar"] h1,
-section[data-testid="stSidebar"] h2,
-section[data-testid="stSidebar"] h3 {
-    color: #58a6ff !important;
-    font-family: 'JetBrains Mono', monospace !important;
-    font-size: 13px !important;
-    letter-spacing: 2px !important;
-    text-transform: uppercase !important;
-}
-
-/* ── Headings ── */
-h1 {
-    font-family: 'JetBrains Mono', monospace !important;
-    color: #58a6ff !important;
-    font-size: 22px !important;
-    letter-spacing: 3px !important;
-    text-transform: uppercase !important;
-    border-bottom: 1px solid #1e2a35;
-    padding-bottom: 12px;
-    margin-bottom: 4px !important;
-}
-h2, h3 {
-    font-family: 'Rajdhani', sans-serif !important;
-    color: #e6edf3 !important;
-    font-weight: 600 !important;
-}
-
-/* ── Buttons ── */
-div[data-testid="stButton"] > button {
-    background: transparent !important;
-    color: #39d353 !important;
-    border: 1px solid #39d353 !important;
-    border-radius: 3px !important;
-    font-family: 'JetBrains Mono', monospace !important;
-    font-size: 13px !important;
-    font-weight: 600 !important;
-    letter-spacing: 1px !important;
-    padding: 8px 24px !important;
-    transition: all 0.2s !important;
-}
-div[data-testid="stButton"] > button:hover {
-    background: #39d35318 !important;
-    box-shadow: 0 0 12px #39d35340 !important;
-    transform: translateY(-1px) !important;
-}
-div[data-testid="stButton"] > button[kind="primary"] {
-    background: #39d35312 !important;
-    border-color: #39d353 !important;
-    box-shadow: 0 0 8px #39d35328 !important;
-}
-
-/* ── Radio ── */
-div[data-testid="stRadio"] label {
-    font-family: 'Rajdhani', sans-serif !important;
-    font-size: 16px !important;
-    color: #c9d1d9 !important;
-    padding: 6px 10px !important;
-    border-radius: 4px !important;
-    transition: color 0.15s !important;
-}
-div[data-testid="stRadio"] label:hover { color: #58a6ff !important; }
-
-/* ── Progress ── */
-div[data-testid="stProgressBar"] > div > div {
-    background: linear-gradient(90deg, #1f6feb, #58a6ff) !important;
-}
+import adaptive
+import assets
+import composite
+import exam_pool
+import history
+import metrics
+import reports
+import review
+import session_store
+from catalog import FILE_MAP, get_catalog, subject_info
+from dedup import cluster_map
+from exam import (ExamSession, cached_block, generate, materialize_perms, new_seed,
+                  prepare_block, seed_key)
+from question_bank import bank_stats, get_bank
+from scoring import evaluate_answers
+from search_index import search_banks
 
-/* ── Selectbox ── */
-div[data-testid="stSelectbox"] > div > div {
-    background: #0d1117 !important;
-    border: 1px solid #1e2a35 !important;
-    color: #c9d1d9 !important;
-    font-family: 'Rajdhani', sans-serif !important;
-}
+st.set_page_config(page_title="Test Ilovasi", page_icon="🧠", layout="wide")
 
-/* ── Info/success/error boxes ── */
-div[data-testid="stAlert"] {
-    border-radius: 4px !important;
-    border-left-width: 3px !important;
-    font-family: 'Rajdhani', sans-serif !important;
-    font-size: 16px !important;
-}
+# Takrorlash rejalashtiruvchisi barcha urinishlardan yangilanadi
+review.install()
 
-/* ── Number input ── */
-div[data-testid="stNumberInput"] input {
-    background: #0d1117 !important;
-    border: 1px solid #1e2a35 !important;
-    color: #e6edf3 !important;
-    font-family: 'JetBrains Mono', monospace !important;
-}
+# Metrikalar (TEST_METRICS=1 bo'lsa) — rerun'lar sessiya bo'yicha sanaladi
+if metrics.ENABLED:
+    if "_reruns" not in st.session_state:
+        st.session_state._reruns = 0
+        metrics.inc("sessions_total")
+    st.session_state._reruns += 1
+    metrics.inc("reruns_total")
+_t_css = metrics.start()
 
-/* ── Custom cards ── */
-.q-card {
-    background: #0d1117;
-    border: 1px solid #1e2a35;
-    border-left: 3px solid #1f6feb;
-    border-radius: 6px;
-    padding: 20px 24px 14px 24px;
-    margin-bottom: 16px;
-}
-.q-num {
-    font-family: 'JetBrains Mono', monospace;
-    font-size: 11px;
-    color: #1f6feb;
-    letter-spacing: 2px;
-    text-transform: uppercase;
-    margin-bottom: 8px;
-}
-.q-text {
-    font-family: 'Rajdhani', sans-serif;
-    font-size: 18px;
-    font-weight: 600;
-    color: #e6edf3;
-    line-height: 1.5;
-}
-.result-correct {
-    background: #0d1117;
-    border: 1px solid #238636;
-    border-left: 3px solid #39d353;
-    border-radius: 4px;
-    padding: 10px 16px;
-    margin-top: 6px;
-    font-family: 'Rajdhani', sans-serif;
-    font-size: 15px;
-    color: #39d353;
-}
-.result-wrong {
-    background: #0d1117;
-    border: 1px solid #da3633;
-    border-left: 3px solid #f85149;
-    border-radius: 4px;
-    padding: 10px 16px;
-    margin-top: 6px;
-    font-family: 'Rajdhani', sans-serif;
-    font-size: 15px;
-    color: #f85149;
-}
-.result-skip {
-    background: #0d1117;
-    border: 1px solid #9e6a03;
-    border-left: 3px solid #d29922;
-    border-radius: 4px;
-    padding: 10px 16px;
-    margin-top: 6px;
-    font-family: 'Rajdhani', sans-serif;
-    font-size: 15px;
-    color: #d29922;
-}
-.score-box {
-    background: #0d1117;
-    border: 1px solid #1e2a35;
-    border-radius: 8px;
-    padding: 32px;
-    text-align: center;
-    margin: 24px 0;
-}
-.score-num {
-    font-family: 'JetBrains Mono', monospace;
-    font-size: 56px;
-    font-weight: 700;
-    color: #58a6ff;
-    line-height: 1;
-}
-.score-label {
-    font-family: 'Rajdhani', sans-serif;
-    font-size: 14px;
-    color: #8b949e;
-    letter-spacing: 2px;
-    text-transform: uppercase;
-    margin-top: 6px;
-}
-.stat-row {
-    display: flex;
-    justify-content: center;
-    gap: 48px;
-    margin-top: 20px;
-}
-.stat-item { text-align: center; }
-.stat-val {
-    font-family: 'JetBrains Mono', monospace;
-    font-size: 22px;
-    font-weight: 700;
-}
-.stat-lbl {
-    font-family: 'Rajdhani', sans-serif;
-    font-size: 12px;
-    color: #8b949e;
-    text-transform: uppercase;
-    letter-spacing: 1px;
-}
-.green { color: #39d353; }
-.red   { color: #f85149; }
-.blue  { color: #58a6ff; }
-.timer-bar {
-    font-family: 'JetBrains Mono', monospace;
-    font-size: 28px;
-    font-weight: 700;
-    color: #58a6ff;
-    letter-spacing: 2px;
-}
-.fan-badge {
-    display: inline-block;
-    background: #1f6feb18;
-    border: 1px solid #1f6feb44;
-    color: #58a6ff;
-    font-family: 'JetBrains Mono', monospace;
-    font-size: 11px;
-    letter-spacing: 1px;
-    padding: 3px 10px;
-    border-radius: 3px;
-    margin-bottom: 16px;
-    text-transform: uppercase;
-}
-.divider {
-    border: none;
-    border-top: 1px solid #1e2a35;
-    margin: 20px 0;
-}
-</style>
-""", unsafe_allow_html=True)
+# ══════════════════════════════════════════════
+# CSS — Terminal/hacker dark aesthetic (static/theme.css)
+# ══════════════════════════════════════════════
+# Mavzu /app/static/ dan keshlanadigan fayl sifatida sessiyada bir marta
+# ulanadi: <link> ota hujjatning <head> iga qo'shiladi va keyingi
+# rerun'larda qayta yuborilmaydi. Statik xizmat o'chiq bo'lsa — inline.
+_theme_url = assets.theme_url() if st.get_option("server.enableStaticServing") else None
+if _theme_url is None:
+    st.markdown(f"<style>{assets.theme_css()}</style>", unsafe_allow_html=True)
+elif not st.session_state.get("_theme_linked"):
+    st.session_state._theme_linked = True
+    st.iframe(f"""
+<script>
+const doc = window.parent.document;
+if (!doc.getElementById("theme-css")) {{
+    const link = doc.createElement("link");
+    link.id = "theme-css";
+    link.rel = "stylesheet";
+    link.href = {json.dumps(_theme_url)};
+    doc.head.appendChild(link);
+}}
+</script>
+""", height=1)
+metrics.stop("css_inject", _t_css)
 
 # ══════════════════════════════════════════════
 # CONSTANTS & CONFIG
 # ══════════════════════════════════════════════
-FILE_MAP = {
-    "Kompyuter Tarmoqlari":    "Kompuyter_tarmoqlari.json",
-    "Elektronika va Sxemalar": "Elektronika_va_sxemalar.json",
-    "Kiberxavfsizlik":         "Kiberxavfsizlik.json",
-    "Diskret Matematika":      "Diskret.json"
-}
 DEFAULT_DURATION = 30   # daqiqa
 TEST_SIZE = 25          # bir testdagi savollar soni
+PAGE_SIZES = [10, 20, 50, 100]
+DEFAULT_PAGE_SIZE = 20  # "To'liq test" sahifasidagi savollar soni
+SEARCH_LIMIT = 200      # admin qidiruvida ko'rsatiladigan natijalar
+
+# Kompozit imtihonlar: fanlar bo'yicha kvotalar (ixtiyoriy "type" bilan)
+BLUEPRINTS = {
+    "Yakuniy imtihon": [
+        {"subject": "Kiberxavfsizlik",      "n": 10},
+        {"subject": "Kompyuter Tarmoqlari", "n": 10},
+        {"subject": "Diskret Matematika",   "n": 5},
+    ],
+}
 
 # ══════════════════════════════════════════════
 # HELPERS
 # ══════════════════════════════════════════════
 
 def load_questions(fname):
+    # Umumiy keshdan (Bank) — har rerun'da JSON qayta parse qilinmaydi
     try:
-        with open(fname, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with metrics.stage("json_load"):
+            return get_bank(fname)
     except FileNotFoundError:
         st.error(f"'{fname}' fayli topilmadi.")
         return []
-    except json.JSONDecodeError:
-        st.error(f"'{fname}' JSON formatida emas.")
+    except json.JSONDecodeError as e:
+        st.error(f"'{fname}' JSON formatida emas ({e.lineno}-qator: {e.msg}). "
+                 f"Batafsil: python bank_import.py {fname}")
         return []
+    except ValueError as e:
+        # Buzilgan yoki eski versiyadagi .qbank
+        st.error(str(e))
+        return []
+
+
+def blueprint_parts(name):
+    # BLUEPRINTS yozuvi -> composite.Part ro'yxati (fan nomi -> fayl)
+    return composite.parse_blueprint([
+        {"file": FILE_MAP[p["subject"]], "n": p["n"], "type": p.get("type"),
+         "label": p["subject"]}
+        for p in BLUEPRINTS[name]])
+
+
+def composite_sha(parts):
+    return ",".join((subject_info(p.file) or {}).get("sha256", "") for p in parts)
 
 
 def fmt_sec(sec):
@@ -283,86 +121,338 @@ def fmt_sec(sec):
     return f"{sec // 60:02d}:{sec % 60:02d}"
 
 
-def answered_count():
-    qs = st.session_state.get("questions", [])
-    return sum(1 for i in range(len(qs)) if st.session_state.get(f"q{i}") not in (None, ""))
-
-
-def pick_questions(all_q, prev_indices, n=TEST_SIZE):
+def countdown(t_end, size=28):
+    """
+    Brauzerda ishlaydigan taymer — server har soniyada rerun qilmaydi.
+    Qolgan vaqt serverdan bir marta uzatiladi, keyin JS o'zi sanaydi.
+    """
+    left = max(0, int((t_end - datetime.now()).total_seconds()))
+    st.iframe(f"""
+<div id="t" style="font-family:'JetBrains Mono',monospace;font-size:{size}px;
+     font-weight:700;color:#58a6ff;letter-spacing:2px;">⏱ {fmt_sec(left)}</div>
+<script>
+const end = Date.now() + {left} * 1000;
+const el = document.getElementById("t");
+const pad = v => String(v).padStart(2, "0");
+function tick() {{
+    const s = Math.max(0, Math.floor((end - Date.now()) / 1000));
+    el.textContent = "⏱ " + pad(Math.floor(s / 60)) + ":" + pad(s % 60);
+    if (s > 0) setTimeout(tick, 250);
+}}
+tick();
+</script>
+<style>body {{ margin: 0; background: transparent; }}</style>
+""", height=size + 16)
+
+
+def progress_live(answered, total, label="", off_page=0):
+    """
+    Javoblar progressi. Savol kartalari fragment bo'lgani uchun javob
+    berilganda sahifa to'liq rerun qilinmaydi — shu sabab hisob brauzerda
+    yangilanadi: asosiy oynadagi belgilangan radio/son maydonlari sanaladi.
+    `answered` — serverdagi boshlang'ich qiymat, `off_page` — joriy
+    sahifadan tashqaridagi javoblar soni (sahifalashda).
     """
-    Weighted random: oldingi testda chiqqan savollar 3x kamroq ehtimol.
-    Bir testda qaytarilmaydi (random.sample).
+    st.iframe(f"""
+<div style="font-family:'Rajdhani',sans-serif;font-size:14px;color:#c9d1d9;">
+  <div id="lbl">{label}{answered}/{total} javob</div>
+  <div style="height:6px;background:#1e2a35;border-radius:3px;margin-top:4px;">
+    <div id="bar" style="height:6px;width:{answered / total * 100 if total else 0:.1f}%;
+         background:linear-gradient(90deg,#1f6feb,#58a6ff);border-radius:3px;"></div>
+  </div>
+</div>
+<script>
+const total = {total}, offPage = {off_page}, label = {json.dumps(label)};
+function count() {{
+    const doc = window.parent.document;
+    const main = doc.querySelector('[data-testid="stMain"]') || doc.querySelector("section.main");
+    if (!main) return null;
+    let n = 0;
+    main.querySelectorAll('[data-testid="stRadio"]').forEach(g => {{
+        if (g.querySelector("input:checked")) n++;
+    }});
+    main.querySelectorAll('[data-testid="stNumberInput"] input').forEach(el => {{
+        if (el.value !== "") n++;
+    }});
+    return n;
+}}
+function update() {{
+    let n;
+    try {{ n = count(); }} catch (e) {{ return; }}
+    if (n === null) return;
+    n = Math.min(offPage + n, total);
+    document.getElementById("lbl").textContent = label + n + "/" + total + " javob";
+    document.getElementById("bar").style.width = (total ? n / total * 100 : 0) + "%";
+}}
+setInterval(update, 500);
+</script>
+<style>body {{ margin: 0; background: transparent; }}</style>
+""", height=36)
+
+
+def instant_result(bank, bank_idx, val):
+    # "Darhol ko'rsat" rejimidagi bitta javob natijasi (option id bo'yicha)
+    opts, correct = bank.interned(bank_idx)
+    return {"correct": val == correct if val is not None else False,
+            "user": opts[val] if val is not None else None,
+            "answer": bank[bank_idx].get("javob")}
+
+
+def evaluate(ex):
+    # Baholash — scoring.py (NumPy); javoblar ex.answers da option id sifatida
+    with metrics.stage("evaluate"):
+        return evaluate_answers(ex.questions(), ex.answers, as_ids=True)
+
+
+def finish_test(test_mode, timed_out=False):
+    ex = state.exam
+    ex.score, ex.results = evaluate(ex)
+    ex.finished = True
+    if test_mode == "25 ta savol":
+        prev = state.get("prev_indices", set())
+        prev.update(ex.indices)
+        state.prev_indices = prev
+    # Tarixga yozish — fon navbati orqali, diskni kutmaydi
+    if isinstance(ex.bank, composite.CompositeBank):
+        # Kompozit — har bir fan o'z urinishi sifatida (bankdagi indekslar bilan)
+        started_at = ex.t_start.timestamp() if ex.t_start else None
+        for k, items in ex.bank.split(ex.indices).items():
+            part_bank = ex.bank.banks[k]
+            history.record_attempt(
+                state.get("user_id"), ex.bank.parts[k].file, test_mode,
+                [local for _, local in items], [part_bank[local] for _, local in items],
+                [ex.results[pos] for pos, _ in items],
+                started_at=started_at,
+                answer_times={j: ex.answer_times[pos] for j, (pos, _) in enumerate(items)
+                              if pos in ex.answer_times},
+                timed_out=timed_out,
+            )
+    else:
+        history.record_attempt(
+            state.get("user_id"), FILE_MAP[subject], test_mode,
+            ex.indices, ex.questions(), ex.results,
+            started_at=ex.t_start.timestamp() if ex.t_start else None,
+            answer_times=ex.answer_times,
+            timed_out=timed_out,
+            seed=ex.seed,
+        )
+    checkpoint()
+
+
+def is_admin():
+    # Admin sahifalari: ?admin=<TEST_ADMIN_TOKEN> (token o'rnatilmagan bo'lsa — yopiq)
+    token = os.environ.get("TEST_ADMIN_TOKEN")
+    given = st.query_params.get("admin")
+    return bool(token) and given is not None and hmac.compare_digest(given.encode(), token.encode())
+
+
+# metrics_extra() dagi joriy holat qiymatlari (qolganlari — monoton counter'lar)
+METRIC_GAUGES = frozenset({"bank_cache_cached", "exam_pool_ready"})
+
+
+def metrics_extra():
+    return {**{f"bank_cache_{k}": v for k, v in bank_stats().items()},
+            **{f"exam_pool_{k}": v for k, v in exam_pool.pool_stats().items()}}
+
+
+def debug_panel():
+    rows, counters = metrics.snapshot()
+    st.caption(f"Ushbu sessiya rerun'lari: {state.get('_reruns', 0)}")
+    if rows:
+        st.dataframe(
+            [{"bosqich": name, "n": r["count"], "o'rtacha ms": round(r["mean_ms"], 2),
+              "p50 ms": round(r["p50_ms"], 2), "p95 ms": round(r["p95_ms"], 2),
+              "max ms": round(r["max_ms"], 2)} for name, r in rows.items()],
+            hide_index=True, use_container_width=True)
+    st.json({**counters, **metrics_extra()}, expanded=False)
+    st.download_button("metrics.prom",
+                       metrics.prometheus_text(metrics_extra(), METRIC_GAUGES),
+                       file_name="metrics.prom", mime="text/plain")
+
+
+# ── Sessiya checkpoint'i (session_store) ────────
+# Minimal holat tashqi omborga yoziladi; sahifa `?sid=` bilan boshqa
+# worker'da ochilsa yoki server qayta ishga tushsa, test davom etadi.
+
+def checkpoint():
+    # Fon writer'iga (session_store.CheckpointWriter) — javob diskni kutmaydi
+    writer = session_store.get_writer()
+    ex = state.get("exam")
+    if writer is None or ex is None or not ex.sid:
+        return
+    t_end = ex.t_end.timestamp() if ex.t_end else None
+    sess = {
+        "subject": state._subject,
+        "mode": state._test_mode,
+        "answer_mode": state._answer_mode,
+        "page_size": state.get("_page_size"),
+        "selection": (state.get("_selection") if state._test_mode == "25 ta savol"
+                      else state.get("_blueprint") if state._test_mode == "Kompozit" else None),
+        "bank_sha": ex.bank_sha,
+        "indices": ex.indices,
+        # seed bo'lsa permutatsiyalar saqlanmaydi — undan qayta tiklanadi
+        "perms": None if ex.seed else ex.perms,
+        "seed": ex.seed,
+        "answers": {i: v for i, v in enumerate(ex.answers) if v not in (None, "")},
+        "answer_times": ex.answer_times,
+        "t_start": ex.t_start.timestamp() if ex.t_start else None,
+        "t_end": t_end,
+        "started": ex.started,
+        "finished": ex.finished,
+        "page": ex.page,
+        "prev": state.get("prev_indices", ()),
+        "review_due": state.get("review_due", 0),
+    }
+    with metrics.stage("checkpoint"):
+        writer.submit(ex.sid, session_store.pack(sess),
+                      (t_end or time.time()) + session_store.TTL)
+
+
+def resume_session(sid):
     """
-    total = len(all_q)
-    weights = []
-    for i in range(total):
-        weights.append(1 if i not in prev_indices else 0.33)
-
-    # Weighted sampling without replacement
-    pool = list(range(total))
-    chosen = []
-    w = weights[:]
-    n = min(n, total)
-    for _ in range(n):
-        total_w = sum(w)
-        r = random.uniform(0, total_w)
-        cum = 0
-        for idx, wi in enumerate(w):
-            cum += wi
-            if r <= cum:
-                chosen.append(pool[idx])
-                w[idx] = 0   # o'chiramiz — bir testda qaytarilmasin
-                break
-    return chosen
-
-
-def prepare_block(all_q, indices):
-    questions, options = [], []
-    for i in indices:
-        q = dict(all_q[i])
-        q["_orig_idx"] = i
-        if "variantlar" in q:
-            opts = q["variantlar"][:]
-            random.shuffle(opts)
-            options.append(opts)
+    `sid` checkpoint'idan sessiyani tiklaydi (widget qiymatlari ham).
+    Bank o'zgargan (sha256 boshqa) yoki checkpoint yo'q bo'lsa — False.
+    """
+    writer = session_store.get_writer()
+    if writer is None or not session_store.valid_sid(sid):
+        return False
+    sess = session_store.unpack(writer.load(sid))
+    if sess is None or sess.get("subject") not in FILE_MAP:
+        return False
+    if sess.get("mode") == "Kompozit":
+        try:
+            parts = blueprint_parts(sess.get("selection"))
+            if composite_sha(parts) != sess.get("bank_sha"):
+                return False
+            bank = composite.load(parts)
+        except (KeyError, OSError, ValueError):
+            return False
+    else:
+        fname = FILE_MAP[sess["subject"]]
+        info = subject_info(fname)
+        if not info or info["sha256"] != sess.get("bank_sha"):
+            return False
+        bank = load_questions(fname)
+    if not bank or any(i >= len(bank) for i in sess["indices"]):
+        return False
+
+    clear_test()
+    st.query_params["sid"] = sid
+    state._subject = sess["subject"]
+    state._test_mode = sess["mode"]
+    state._answer_mode = sess["answer_mode"]
+    if sess.get("page_size"):
+        state._page_size = sess["page_size"]
+    if sess.get("selection"):
+        if sess["mode"] == "Kompozit":
+            state._blueprint = sess["selection"]
         else:
-            options.append(None)
-        questions.append(q)
-    return questions, options
-
-
-def evaluate(questions):
-    score, results = 0, []
-    for i, q in enumerate(questions):
-        ua = st.session_state.get(f"q{i}")
-        if q.get("type") == "calculation":
-            try:
-                uv = float(ua) if ua not in (None, "") else None
-                cv = float(q["to_g_ri_javob"])
-                tol = float(q.get("tolerance", 0.01))
-                ok = uv is not None and abs(uv - cv) <= tol
-            except Exception:
-                ok = False
-                uv = None
-                cv = q.get("to_g_ri_javob")
-            results.append({"correct": ok, "user": ua, "answer": cv})
+            state._selection = sess["selection"]
+    state["_combo"] = f"{sess['subject']}|{sess['mode']}|{sess.get('selection')}"
+    state.prev_indices = sess["prev"]
+
+    state.review_due = sess.get("review_due", 0)
+    perms = sess["perms"] if sess["perms"] is not None else [None] * len(sess["indices"])
+    ex = ExamSession(bank, sess["indices"], perms)
+    ex.seed = sess.get("seed")
+    ex.sid = sid
+    ex.bank_sha = sess["bank_sha"]
+    ex.page = sess.get("page", 0)
+    ex.started = sess["started"]
+    ex.finished = sess["finished"]
+    if sess.get("t_start"):
+        ex.t_start = datetime.fromtimestamp(sess["t_start"])
+    if sess.get("t_end"):
+        ex.t_end = datetime.fromtimestamp(sess["t_end"])
+    for i, val in sess["answers"].items():
+        if 0 <= i < len(ex):
+            ex.answer(i, val)
+            # Darhol natija faqat multiple_choice uchun (make_on_change kabi)
+            if (sess["answer_mode"] == "Darhol ko'rsat"
+                    and bank[ex.indices[i]].get("type", "multiple_choice") == "multiple_choice"):
+                ex.instant[i] = instant_result(bank, ex.indices[i], val)
+    ex.answer_times = sess["answer_times"]
+    if ex.finished:
+        ex.score, ex.results = evaluate(ex)
+    state.exam = ex
+    return True
+
+
+def reports_panel(polling):
+    # Admin: hisobotlar fonda yaratiladi (reports.py), bu yerda faqat holat
+    kind = st.selectbox("Hisobot:", list(reports.KINDS), format_func=reports.KINDS.get,
+                        key="_rep_kind")
+    fmt = st.radio("Format:", reports.FORMATS, horizontal=True, key="_rep_fmt")
+    if st.button("Yaratish", key="_rep_go", use_container_width=True):
+        state.setdefault("_report_jobs", []).append(reports.submit(kind, FILE_MAP[subject], fmt))
+        st.rerun()
+    jobs = state.get("_report_jobs", [])
+    for job_id in reversed(jobs):
+        job = reports.poll(job_id)
+        if job is None:
+            continue
+        label = f"{reports.KINDS[job['kind']]} · {job['fmt'].upper()}"
+        if job["status"] == "tayyor":
+            with open(job["path"], "rb") as f:
+                st.download_button(f"⬇ {label}", f.read(), key=f"_rep_dl_{job_id}",
+                                   file_name=os.path.basename(job["path"]),
+                                   use_container_width=True)
+        elif job["status"] == "xato":
+            st.error(f"{label}: {job['error']}")
         else:
-            ca = q.get("javob")
-            ok = (ua == ca) if ua not in (None, "") else False
-            results.append({"correct": ok, "user": ua, "answer": ca})
-        if ok:
-            score += 1
-    return score, results
+            st.progress(job["progress"], text=f"{label} — {job['done']}/{job['total']}")
+    if polling and not reports.active(jobs):
+        # Hammasi tugadi — to'liq rerun bilan so'rovni to'xtatamiz
+        st.rerun()
+
+
+def search_page():
+    # Admin: barcha banklar bo'yicha savol/variant qidiruvi (search_index)
+    st.markdown("# 🔎 SAVOLLAR QIDIRUVI")
+    available = [n for n in FILE_MAP if catalog.get(n)]
+    subjects = st.multiselect("Fanlar:", available, default=available, key="_search_subjects")
+    col_q, col_f = st.columns([4, 1])
+    with col_q:
+        query = st.text_input("Qidiruv:", key="_search_q", label_visibility="collapsed",
+                              placeholder="Savol yoki variant matni...")
+    with col_f:
+        fuzzy = st.toggle("Fuzzy", value=True, key="_search_fuzzy")
+    if not query.strip():
+        st.caption("So'z yoki so'z boshini kiriting — tutuq belgisi (’ ‘ ') farqi hisobga olinmaydi.")
+        return
+
+    t0 = time.perf_counter()
+    with metrics.stage("search"):
+        hits = search_banks([FILE_MAP[n] for n in subjects], query,
+                            limit=SEARCH_LIMIT, fuzzy=fuzzy)
+    ms = (time.perf_counter() - t0) * 1000
+    st.caption(f"{len(hits)} ta natija · {ms:.1f} ms")
+    if not hits:
+        return
+    names = {f: n for n, f in FILE_MAP.items()}
+    rows = []
+    for score, fname, i in hits:
+        q = get_bank(fname)[i]
+        rows.append({
+            "fan": names[fname],
+            "id": q.get("id", i),
+            "savol": q.get("savol"),
+            "variantlar": " | ".join(map(str, q.get("variantlar") or ())),
+            "javob": q.get("javob", q.get("to_g_ri_javob")),
+            "ball": score,
+        })
+    st.dataframe(rows, hide_index=True, use_container_width=True)
 
 
 def clear_test():
-    keys_to_del = [k for k in st.session_state.keys()
-                   if k.startswith("q") and k[1:].isdigit()]
-    for k in keys_to_del:
-        del st.session_state[k]
-    for k in ["questions", "options", "results", "score",
-              "started", "finished", "t_start", "t_end", "instant"]:
-        st.session_state.pop(k, None)
+    # Butun test holati bitta obyektda — kalitlarni skan qilish shart emas;
+    # eski widget'lar (boshqa `ex.key` prefiksi) keyingi rerun'da tashlanadi
+    ex = state.pop("exam", None)
+    writer = session_store.get_writer()
+    if writer is not None and ex is not None and ex.sid:
+        writer.delete(ex.sid)
+    state.pop("review_due", None)
+    st.query_params.pop("sid", None)
 
 
 # ══════════════════════════════════════════════
@@ -370,36 +460,59 @@ def clear_test():
 # ══════════════════════════════════════════════
 state = st.session_state
 
+_sid = st.query_params.get("sid")
+# Belgilangan variant (`?seed=N`) — masalan, butun guruh uchun bir xil test
+_seed = st.query_params.get("seed", "")
+fixed_seed = int(_seed) if _seed.isdigit() and len(_seed) <= 12 else None
+_cur = state.get("exam")
+if _sid and (_cur.sid if _cur else None) != _sid and state.get("_resume_failed") != _sid:
+    if not resume_session(_sid):
+        state._resume_failed = _sid
+        st.query_params.pop("sid", None)
+
 with st.sidebar:
     st.markdown("### // SOZLAMALAR")
 
-    q_counts = {}
-    for n, f in FILE_MAP.items():
-        if os.path.exists(f):
-            try:
-                q_counts[n] = len(json.load(open(f, encoding="utf-8")))
-            except Exception:
-                q_counts[n] = 0
-        else:
-            q_counts[n] = 0
+    # Ixtiyoriy — kiritilsa, oldingi urinishlar tarixdan hisobga olinadi
+    st.text_input("Talaba ID:", key="user_id", placeholder="Talaba ID (ixtiyoriy)",
+                  label_visibility="collapsed")
 
-    subject_opts = [f"{n}  [{q_counts[n]}]" for n in FILE_MAP]
-    sel = st.selectbox("Fan:", subject_opts, label_visibility="collapsed")
-    subject = sel.split("  [")[0]
+    with metrics.stage("sidebar_scan"):
+        catalog = get_catalog(FILE_MAP)
+    q_counts = {n: (info["count"] if info else 0) for n, info in catalog.items()}
+
+    subject = st.selectbox("Fan:", list(FILE_MAP), key="_subject",
+                           format_func=lambda n: f"{n}  [{q_counts[n]}]",
+                           label_visibility="collapsed")
 
     st.markdown("---")
 
     test_mode = st.radio(
         "Test turi:",
-        ["25 ta savol", "To'liq test"],
+        ["25 ta savol", "To'liq test", "Takrorlash", "Kompozit"],
+        key="_test_mode",
         label_visibility="collapsed"
     )
+    page_size = 0
+    selection = None
+    if test_mode == "25 ta savol":
+        # Moslashuvchan — savollar statistikasi bo'yicha (adaptive.py)
+        selection = st.radio("Tanlash:", ["Tasodifiy", "Moslashuvchan"], key="_selection",
+                             horizontal=True)
+    if test_mode == "Kompozit":
+        # Bir nechta fandan — BLUEPRINTS kvotalari bo'yicha (composite.py)
+        selection = st.selectbox("Imtihon:", list(BLUEPRINTS), key="_blueprint")
+    if test_mode == "To'liq test":
+        if "_page_size" not in state:
+            state._page_size = DEFAULT_PAGE_SIZE
+        page_size = st.select_slider("Sahifada savollar:", PAGE_SIZES, key="_page_size")
 
     st.markdown("---")
 
     answer_mode = st.radio(
         "Javob:",
         ["Darhol ko'rsat", "Oxirida ko'rsat"],
+        key="_answer_mode",
         label_visibility="collapsed"
     )
     instant = answer_mode == "Darhol ko'rsat"
@@ -407,236 +520,447 @@ with st.sidebar:
     st.markdown("---")
     duration = st.slider("Vaqt (daqiqa)", 5, 120, DEFAULT_DURATION, 5)
 
-    # Timer sidebar
-    if state.get("started") and not state.get("finished"):
-        left = state.get("t_end", datetime.now()) - datetime.now()
-        secs = max(0, int(left.total_seconds()))
-        aq = answered_count()
-        tq = len(state.get("questions", []))
+    admin_search = False
+    if is_admin():
         st.markdown("---")
-        st.markdown(f"<div class='timer-bar'>⏱ {fmt_sec(secs)}</div>", unsafe_allow_html=True)
-        st.progress(aq / tq if tq else 0, text=f"{aq}/{tq} javob")
+        admin_search = st.toggle("// SAVOLLAR QIDIRUVI", key="_admin_search")
+        with st.expander("// HISOBOTLAR"):
+            polling = reports.active(state.get("_report_jobs", ()))
+            st.fragment(run_every=1 if polling else None)(reports_panel)(polling)
+
+    if metrics.ENABLED:
+        metrics.start_dumper(metrics_extra, METRIC_GAUGES)
+        if is_admin():
+            with st.expander("// METRIKALAR"):
+                debug_panel()
+
+if admin_search:
+    search_page()
+    st.stop()
 
 # ══════════════════════════════════════════════
 # COMBO RESET — fan yoki rejim o'zgarganda
 # ══════════════════════════════════════════════
-combo = f"{subject}|{test_mode}"
+combo = f"{subject}|{test_mode}|{selection}"
 if state.get("_combo") != combo:
     clear_test()
     state.pop("prev_indices", None)
     state["_combo"] = combo
 
-all_q = load_questions(FILE_MAP[subject])
-if not all_q:
+if test_mode == "Kompozit":
+    try:
+        parts = blueprint_parts(selection)
+    except (KeyError, ValueError) as e:
+        st.error(f"'{selection}' blueprint'i noto'g'ri: {e}")
+        st.stop()
+    badge = f"{selection} — " + " · ".join(f"{p.label} {p.n}" for p in parts)
+else:
+    all_q = load_questions(FILE_MAP[subject])
+    if not all_q:
+        st.stop()
+
+    # Tayyor bloklar hovuzi (fonda to'ldiriladi) — faqat joriy rejim
+    # hovuzdan olsa: boshqa rejimlar uchun bloklar behuda qurilmaydi
+    if fixed_seed is None and "exam" not in state:
+        if test_mode == "25 ta savol" and selection == "Tasodifiy":
+            exam_pool.warm(FILE_MAP[subject], TEST_SIZE)
+        elif test_mode == "To'liq test":
+            exam_pool.warm(FILE_MAP[subject])
+
+    q_count = len(all_q)
+    badge_count = catalog[subject]["count"] if catalog.get(subject) else q_count
+    badge = f"{subject} — {badge_count} ta savol"
+
+if test_mode == "Takrorlash" and not state.get("user_id") and "exam" not in state:
+    # Rejalashtiruvchi holati talaba bo'yicha saqlanadi (review.py)
+    st.info("🔁 Takrorlash rejimi uchun Talaba ID kiriting")
     st.stop()
 
-q_count = len(all_q)
-
 # ══════════════════════════════════════════════
 # HEADER
 # ══════════════════════════════════════════════
 st.markdown(f"# 🧠 TEST ILOVASI")
-st.markdown(f"<div class='fan-badge'>{subject} — {q_count} ta savol</div>", unsafe_allow_html=True)
+st.markdown(f"<div class='fan-badge'>{badge}</div>", unsafe_allow_html=True)
 
 # ══════════════════════════════════════════════
 # SAVOLLARNI TAYYORLASH
 # ══════════════════════════════════════════════
-if "questions" not in state:
+if "exam" not in state:
+    # Har test (fan, bank sha256, seed) dan deterministik — exam.seed_key.
+    # `?seed=N` — belgilangan variant: bir xil seed'li sessiyalar keshdagi
+    # bitta blokni bo'lishadi (prev hisobga olinmaydi). Aks holda yangi seed
+    # yoki hovuzdagi tayyor blok (exam_pool); prev bo'lsa — shu yerda.
+    if test_mode == "Kompozit":
+        bank_sha = composite_sha(parts)
+        key = seed_key(selection, bank_sha, fixed_seed if fixed_seed is not None else new_seed())
+    else:
+        bank_sha = (catalog.get(subject) or {}).get("sha256")
+        key = seed_key(FILE_MAP[subject], bank_sha,
+                       fixed_seed if fixed_seed is not None else new_seed())
+    rng = random.Random(key)
     if test_mode == "25 ta savol":
         prev = state.get("prev_indices", set())
-        indices = pick_questions(all_q, prev, TEST_SIZE)
+        if state.get("user_id"):
+            prev = prev | history.seen_indices(state.user_id, FILE_MAP[subject])
+        clusters = cluster_map(FILE_MAP[subject])
+        if selection == "Moslashuvchan":
+            # Talaba tarixi bo'lsa — uning darajasiga mos, aks holda qiyinlik profili
+            stats = adaptive.load_stats(FILE_MAP[subject], q_count)
+            acc = history.user_accuracy(state.get("user_id"), FILE_MAP[subject])
+            target = adaptive.mastery_target(acc) if acc is not None else None
+            block = prepare_block(all_q, adaptive.draw(stats, TEST_SIZE, prev, rng, target=target,
+                                                       clusters=clusters), seed=key)
+        elif fixed_seed is not None:
+            block = cached_block(all_q, key, TEST_SIZE, clusters)
+        else:
+            claimed = None if prev else exam_pool.claim(all_q, FILE_MAP[subject], TEST_SIZE)
+            if claimed is not None:
+                key, block = claimed
+            else:
+                block = generate(all_q, key, TEST_SIZE, prev, clusters)
+    elif test_mode == "Kompozit":
+        # Fanlar banklari parallel yuklanadi va tanlanadi
+        try:
+            with metrics.stage("composite_build"):
+                all_q, comp_idx = composite.build(parts, rng)
+        except FileNotFoundError as e:
+            st.error(f"'{e.filename}' fayli topilmadi.")
+            st.stop()
+        except ValueError as e:
+            st.error(f"Kompozit imtihon tayyorlanmadi: {e}")
+            st.stop()
+        block = prepare_block(all_q, comp_idx, seed=key)
+    elif test_mode == "Takrorlash":
+        # Muddati kelgan savollar (SM-2 navbati), qolgani — yangi savollar
+        review_idx, state.review_due = review.next_block(
+            state.user_id, FILE_MAP[subject], all_q, TEST_SIZE, rng,
+            clusters=cluster_map(FILE_MAP[subject]))
+        block = prepare_block(all_q, review_idx, seed=key)
+    elif fixed_seed is not None:
+        block = cached_block(all_q, key)
     else:
-        indices = list(range(q_count))
-        random.shuffle(indices)
-
-    questions, options = prepare_block(all_q, indices)
-    state.questions = questions
-    state.options = options
-    state.results = [None] * len(questions)
-    state.score = 0
-    state.started = False
-    state.finished = False
-    state.instant = {}
-
-questions = state.questions
-opts_all  = state.options
-n_q       = len(questions)
+        claimed = exam_pool.claim(all_q, FILE_MAP[subject])
+        if claimed is not None:
+            key, block = claimed
+        else:
+            block = generate(all_q, key, lazy=bool(page_size))
+
+    state.exam = ExamSession(all_q, *block)
+    state.exam.seed = key
+    state.exam.bank_sha = bank_sha
+
+    if session_store.get_store() is not None:
+        state.exam.sid = uuid.uuid4().hex
+        st.query_params["sid"] = state.exam.sid
+        checkpoint()
+
+exam = state.exam
+n_q = len(exam)
 
 # ══════════════════════════════════════════════
 # BOSHLASH EKRANI
 # ══════════════════════════════════════════════
-if not state.get("started") and not state.get("finished"):
-    label = f"{n_q} ta savol" if test_mode == "25 ta savol" else f"To'liq test — {n_q} ta savol"
-    st.info(f"📋 {label} · ⏱ {duration} daqiqa")
+if not exam.started and not exam.finished:
+    if test_mode == "To'liq test":
+        label = f"To'liq test — {n_q} ta savol"
+    elif test_mode == "Kompozit":
+        label = f"{selection} — {n_q} ta savol"
+    elif test_mode == "Takrorlash":
+        due = min(state.get("review_due", 0), n_q)
+        label = f"Takrorlash — {due} ta takror, {n_q - due} ta yangi"
+    else:
+        label = f"{n_q} ta savol"
+    st.info(f"📋 {label} · ⏱ {duration} daqiqa · variant {exam.variant}")
     if st.button("▶  TESTNI BOSHLASH", type="primary"):
-        state.started = True
-        state.t_start = datetime.now()
-        state.t_end   = datetime.now() + timedelta(minutes=duration)
+        exam.started = True
+        exam.t_start = datetime.now()
+        exam.t_end   = datetime.now() + timedelta(minutes=duration)
+        checkpoint()
         st.rerun()
     st.stop()
 
+# ══════════════════════════════════════════════
+# BLOKLAR — savol kartasi va natija paneli (fragment)
+# ══════════════════════════════════════════════
+
+def result_line(res):
+    ua = res["user"]
+    ca = res["answer"]
+    if ua is None:
+        st.markdown(f"<div class='result-skip'>— Javob berilmagan · To'g'ri: <b>{ca}</b></div>", unsafe_allow_html=True)
+    elif res["correct"]:
+        st.markdown(f"<div class='result-correct'>✓ To'g'ri: <b>{ua}</b></div>", unsafe_allow_html=True)
+    else:
+        st.markdown(f"<div class='result-wrong'>✗ Xato: <b>{ua}</b> · To'g'ri: <b>{ca}</b></div>", unsafe_allow_html=True)
+
+
+def make_on_change(qi, bank_idx, instant):
+    # Widget kaliti ex.widget_key(i) — sahifadan chiqqanda Streamlit uni
+    # o'chiradi, javob esa ex.answers da saqlanadi (option id yoki son).
+    def _cb():
+        ex = state.exam
+        val = state.get(ex.widget_key(qi))
+        ex.answer(qi, val, time.time())
+        if instant:
+            ex.instant[qi] = instant_result(ex.bank, bank_idx, val)
+        checkpoint()
+    return _cb
+
+
+@st.fragment
+def question_card(i, is_done, instant):
+    _t = metrics.start()
+    ex     = state.exam
+    qi     = ex.indices[i]
+    q      = ex.bank[qi]
+    res    = ex.results[i] if is_done else None
+    inst_r = ex.instant.get(i) if not is_done else None
+    q_type = q.get("type", "multiple_choice")
+
+    q_id = ex.bank.key(qi) if isinstance(ex.bank, composite.CompositeBank) else q.get("id", qi)
+    st.markdown(
+        f"<div class='q-card'>"
+        f"<div class='q-num'>"
+        f"{i+1} / <span style='color:#58a6ff;'>{q_id}</span>"
+        f"</div>"
+        f"<div class='q-text'>{q['savol']}</div>"
+        f"</div>",
+        unsafe_allow_html=True
+    )
+
+    key = ex.widget_key(i)
+    cur = ex.answers[i]
+    on_change = make_on_change(i, qi, instant)
+
+    if q_type == "multiple_choice":
+        opts, _ = ex.bank.interned(qi)
+        perm = ex.perms[i] or ()
+        def_idx = perm.index(cur) if isinstance(cur, int) and cur in perm else None
+
+        disabled = is_done or (instant and inst_r is not None)
+
+        if instant and not is_done:
+            st.radio("Javob:", list(perm), key=key, index=def_idx,
+                     format_func=opts.__getitem__,
+                     label_visibility="collapsed",
+                     disabled=disabled,
+                     on_change=on_change)
+            if inst_r is not None:
+                if inst_r["correct"]:
+                    st.markdown("<div class='result-correct'>✓ To'g'ri!</div>", unsafe_allow_html=True)
+                else:
+                    st.markdown(f"<div class='result-wrong'>✗ Xato — To'g'ri javob: <b>{inst_r['answer']}</b></div>", unsafe_allow_html=True)
+        else:
+            st.radio("Javob:", list(perm), key=key, index=def_idx,
+                     format_func=opts.__getitem__,
+                     label_visibility="collapsed", disabled=is_done,
+                     on_change=on_change)
+            if is_done and res:
+                result_line(res)
+
+    elif q_type == "calculation":
+        st.number_input("Javob (son):", key=key, value=cur, format="%.2f",
+                        disabled=is_done, on_change=make_on_change(i, qi, False))
+        if is_done and res:
+            result_line(res)
+
+    st.markdown("<hr class='divider'>", unsafe_allow_html=True)
+    metrics.stop("question_card", _t)
+
+
+def set_page(p):
+    state.exam.page = p
+    checkpoint()
+
+
+def navigator_live(lo, hi):
+    """
+    Navigator katakchalari (progress_live kabi) brauzerda yangilanadi:
+    javob berilganda faqat karta fragmenti rerun bo'ladi, strip esa
+    qayta chizilmaydi. Joriy sahifadagi har bir savol o'z widget
+    konteyneri (Streamlit'ning `st-key-<kalit>` klassi) orqali topiladi.
+    """
+    keys = [f"st-key-{state.exam.widget_key(i)}" for i in range(lo, hi)]
+    st.iframe(f"""
+<script>
+const lo = {lo}, keys = {json.dumps(keys)};
+function update() {{
+    const doc = window.parent.document;
+    const nav = doc.querySelector(".q-nav");
+    if (!nav) return;
+    keys.forEach((k, j) => {{
+        const box = doc.querySelector("." + k), cell = nav.children[lo + j];
+        if (!box || !cell) return;
+        const num = box.querySelector('[data-testid="stNumberInput"] input');
+        cell.classList.toggle("done", num ? num.value !== "" : !!box.querySelector("input:checked"));
+    }});
+}}
+setInterval(update, 500);
+</script>
+""", height=1)
+
+
+def question_navigator(page, page_size, n_pages, live=False):
+    answers = state.exam.answers
+    n_q = len(answers)
+    cells = []
+    for i in range(n_q):
+        cls = "done" if answers[i] not in (None, "") else ""
+        if i // page_size == page:
+            cls += " cur"
+        cells.append(f"<span class='{cls}'>{i+1}</span>")
+    st.markdown(f"<div class='q-nav'>{''.join(cells)}</div>", unsafe_allow_html=True)
+    if live:
+        navigator_live(page * page_size, min(n_q, (page + 1) * page_size))
+
+    for row in range(0, n_pages, 10):
+        cols = st.columns(10)
+        for p, col in zip(range(row, min(row + 10, n_pages)), cols):
+            lo, hi = p * page_size, min(n_q, (p + 1) * page_size)
+            col.button(f"{lo+1}–{hi}", key=f"_pg{p}",
+                       type="primary" if p == page else "secondary",
+                       use_container_width=True,
+                       on_click=set_page, args=(p,))
+
+
+@st.fragment
+def results_panel():
+    ex    = state.exam
+    sc    = ex.score
+    total = len(ex)
+    pct   = sc / total * 100 if total else 0
+    wrong = total - sc
+    spent = (datetime.now() - ex.t_start).total_seconds() if ex.t_start else 0
+
+    grade_color = "green" if pct >= 70 else ("blue" if pct >= 50 else "red")
+    grade_icon  = "✓" if pct >= 70 else ("△" if pct >= 50 else "✗")
+
+    st.markdown(f"""
+    <div class='score-box'>
+        <div class='score-num {grade_color}'>{pct:.0f}%</div>
+        <div class='score-label'>{grade_icon} {sc} / {total} to'g'ri javob</div>
+        <div class='stat-row'>
+            <div class='stat-item'>
+                <div class='stat-val green'>{sc}</div>
+                <div class='stat-lbl'>To'g'ri</div>
+            </div>
+            <div class='stat-item'>
+                <div class='stat-val red'>{wrong}</div>
+                <div class='stat-lbl'>Xato</div>
+            </div>
+            <div class='stat-item'>
+                <div class='stat-val blue'>{fmt_sec(spent)}</div>
+                <div class='stat-lbl'>Vaqt</div>
+            </div>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    st.progress(pct / 100)
+    st.caption(f"Variant: {ex.variant}")
+
+    if isinstance(ex.bank, composite.CompositeBank):
+        # Fanlar bo'yicha natija
+        cells = "".join(
+            f"<div class='stat-item'><div class='stat-val blue'>{c} / {t}</div>"
+            f"<div class='stat-lbl'>{label}</div></div>"
+            for label, c, t in composite.subscores(ex.bank, ex.indices, ex.results))
+        st.markdown(f"<div class='stat-row'>{cells}</div>", unsafe_allow_html=True)
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        if st.button("↺  YANGI TEST", type="primary", use_container_width=True):
+            clear_test()
+            st.rerun()
+
+
 # ══════════════════════════════════════════════
 # TEST JARAYONI
 # ══════════════════════════════════════════════
-if state.get("started"):
+if exam.started:
 
     # Vaqt tugadimi?
-    time_left = state.t_end - datetime.now()
-    if time_left.total_seconds() <= 0 and not state.get("finished"):
-        sc, res = evaluate(questions)
-        state.score   = sc
-        state.results = res
-        state.finished = True
-        if test_mode == "25 ta savol":
-            prev = state.get("prev_indices", set())
-            prev.update(q["_orig_idx"] for q in questions)
-            state.prev_indices = prev
+    time_left = exam.t_end - datetime.now()
+    if time_left.total_seconds() <= 0 and not exam.finished:
+        finish_test(test_mode, timed_out=True)
         st.rerun()
 
-    is_done = state.get("finished", False)
+    is_done = exam.finished
+
+    # Sahifalash — faqat joriy sahifadagi savollar chiziladi
+    if page_size and n_q > page_size:
+        n_pages = math.ceil(n_q / page_size)
+        page = min(exam.page, n_pages - 1)
+    else:
+        page_size, n_pages, page = n_q, 1, 0
+    lo, hi = page * page_size, min(n_q, (page + 1) * page_size)
+    materialize_perms(exam.bank, exam.indices, exam.perms, lo, hi, exam.seed)
 
-    # Progress bar (faqat test davomida)
+    # Progress va taymer (faqat test davomida) — brauzerda yangilanadi
     if not is_done:
-        aq = answered_count()
+        aq = exam.answered
+        off_page = aq - exam.answered_in(lo, hi)
         col_p, col_t = st.columns([4, 1])
         with col_p:
-            st.progress(aq / n_q if n_q else 0, text=f"Javoblar: {aq}/{n_q}")
+            progress_live(aq, n_q, "Javoblar: ", off_page)
         with col_t:
-            secs = max(0, int(time_left.total_seconds()))
-            st.markdown(f"<div class='timer-bar'>{fmt_sec(secs)}</div>", unsafe_allow_html=True)
+            countdown(exam.t_end)
+        with st.sidebar:
+            st.markdown("---")
+            countdown(exam.t_end)
+            progress_live(aq, n_q, off_page=off_page)
+
+    if n_pages > 1:
+        question_navigator(page, page_size, n_pages, live=not is_done)
 
     st.markdown("<hr class='divider'>", unsafe_allow_html=True)
 
     # ── Savollar ──────────────────────────────
-    for i, q in enumerate(questions):
-        opts   = opts_all[i]
-        res    = state.results[i] if is_done else None
-        inst_r = state.instant.get(i) if not is_done else None
-        q_type = q.get("type", "multiple_choice")
-
-        q_id = q.get("id", q.get("_orig_idx", "—"))
-        st.markdown(
-            f"<div class='q-card'>"
-            f"<div class='q-num'>"
-            f"{i+1} / <span style='color:#58a6ff;'>{q_id}</span>"
-            f"</div>"
-            f"<div class='q-text'>{q['savol']}</div>"
-            f"</div>",
-            unsafe_allow_html=True
-        )
-
-        key = f"q{i}"
-        cur = state.get(key)
-
-        if q_type == "multiple_choice":
-            try:
-                def_idx = opts.index(cur) if cur in opts else None
-            except (ValueError, TypeError):
-                def_idx = None
-
-            disabled = is_done or (instant and inst_r is not None)
-
-            def make_on_change(qi, qdata):
-                def _cb():
-                    val = state.get(f"q{qi}")
-                    ca  = qdata.get("javob")
-                    ok  = (val == ca) if val not in (None, "") else False
-                    state.instant[qi] = {"correct": ok, "user": val, "answer": ca}
-                return _cb
-
-            if instant and not is_done:
-                st.radio("", opts, key=key, index=def_idx,
-                         label_visibility="collapsed",
-                         disabled=disabled,
-                         on_change=make_on_change(i, q))
-                if inst_r is not None:
-                    if inst_r["correct"]:
-                        st.markdown("<div class='result-correct'>✓ To'g'ri!</div>", unsafe_allow_html=True)
-                    else:
-                        st.markdown(f"<div class='result-wrong'>✗ Xato — To'g'ri javob: <b>{inst_r['answer']}</b></div>", unsafe_allow_html=True)
-            else:
-                st.radio("", opts, key=key, index=def_idx,
-                         label_visibility="collapsed", disabled=is_done)
-                if is_done and res:
-                    ua = res["user"]
-                    ca = res["answer"]
-                    if ua is None:
-                        st.markdown(f"<div class='result-skip'>— Javob berilmagan · To'g'ri: <b>{ca}</b></div>", unsafe_allow_html=True)
-                    elif res["correct"]:
-                        st.markdown(f"<div class='result-correct'>✓ To'g'ri: <b>{ua}</b></div>", unsafe_allow_html=True)
-                    else:
-                        st.markdown(f"<div class='result-wrong'>✗ Xato: <b>{ua}</b> · To'g'ri: <b>{ca}</b></div>", unsafe_allow_html=True)
-
-        elif q_type == "calculation":
-            st.number_input("Javob (son):", key=key, format="%.2f", disabled=is_done)
-            if is_done and res:
-                ua = res["user"]
-                ca = res["answer"]
-                if ua is None:
-                    st.markdown(f"<div class='result-skip'>— Javob berilmagan · To'g'ri: <b>{ca}</b></div>", unsafe_allow_html=True)
-                elif res["correct"]:
-                    st.markdown(f"<div class='result-correct'>✓ To'g'ri: <b>{ua}</b></div>", unsafe_allow_html=True)
-                else:
-                    st.markdown(f"<div class='result-wrong'>✗ Xato: <b>{ua}</b> · To'g'ri: <b>{ca}</b></div>", unsafe_allow_html=True)
-
-        st.markdown("<hr class='divider'>", unsafe_allow_html=True)
+    # Har bir karta — alohida fragment: javob berilganda faqat shu karta
+    # qayta hisoblanadi, qolgan savollar serverda qayta chizilmaydi.
+    _t_render = metrics.start()
+    for i in range(lo, hi):
+        question_card(i, is_done, instant)
+    metrics.stop("render_loop", _t_render)
+
+    if n_pages > 1:
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            st.button("◀  OLDINGI", key="_pg_prev", disabled=page == 0,
+                      use_container_width=True, on_click=set_page, args=(page - 1,))
+        with col3:
+            st.button("KEYINGI  ▶", key="_pg_next", disabled=page == n_pages - 1,
+                      use_container_width=True, on_click=set_page, args=(page + 1,))
 
     # ── Yakunlash tugmasi ──────────────────────
     if not is_done:
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
             if st.button("✔  TESTNI YAKUNLASH", type="primary", use_container_width=True):
-                sc, res = evaluate(questions)
-                state.score   = sc
-                state.results = res
-                state.finished = True
-                if test_mode == "25 ta savol":
-                    prev = state.get("prev_indices", set())
-                    prev.update(q["_orig_idx"] for q in questions)
-                    state.prev_indices = prev
+                finish_test(test_mode)
                 st.rerun()
 
     # ── Natija ekrani ──────────────────────────
     if is_done:
-        sc    = state.score
-        total = n_q
-        pct   = sc / total * 100 if total else 0
-        wrong = total - sc
-        spent = (datetime.now() - state.t_start).total_seconds() if state.get("t_start") else 0
-
-        grade_color = "green" if pct >= 70 else ("blue" if pct >= 50 else "red")
-        grade_icon  = "✓" if pct >= 70 else ("△" if pct >= 50 else "✗")
-
-        st.markdown(f"""
-        <div class='score-box'>
-            <div class='score-num {grade_color}'>{pct:.0f}%</div>
-            <div class='score-label'>{grade_icon} {sc} / {total} to'g'ri javob</div>
-            <div class='stat-row'>
-                <div class='stat-item'>
-                    <div class='stat-val green'>{sc}</div>
-                    <div class='stat-lbl'>To'g'ri</div>
-                </div>
-                <div class='stat-item'>
-                    <div class='stat-val red'>{wrong}</div>
-                    <div class='stat-lbl'>Xato</div>
-                </div>
-                <div class='stat-item'>
-                    <div class='stat-val blue'>{fmt_sec(spent)}</div>
-                    <div class='stat-lbl'>Vaqt</div>
-                </div>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-
-        st.progress(pct / 100)
-
-        col1, col2, col3 = st.columns([1, 2, 1])
-        with col2:
-            if st.button("↺  YANGI TEST", type="primary", use_container_width=True):
-                clear_test()
-                st.rerun()
-
-# ── Auto-rerun (taymer) ────────────────────────
-if state.get("started") and not state.get("finished"):
-    time.sleep(1)
-    st.rerun()
+        results_panel()
+
+# ── Vaqt tugashini kuzatish ────────────────────
+# Taymer brauzerda sanaydi; server faqat t_end paytida bir marta uyg'onadi
+# va avtomatik yakunlaydi (oldingi har soniyalik rerun o'rniga).
+if exam.started and not exam.finished:
+    secs_left = max(0.0, (exam.t_end - datetime.now()).total_seconds())
+
+    @st.fragment(run_every=timedelta(seconds=secs_left + 0.5))
+    def deadline_watch():
+        if not state.get("_deadline_armed"):
+            # To'liq rerun ichidagi birinchi chaqiruv — faqat qurollantiramiz
+            state._deadline_armed = True
+            return
+        ex = state.get("exam")
+        if ex is not None and datetime.now() >= ex.t_end and not ex.finished:
+            finish_test(test_mode, timed_out=True)
+        # Erta uyg'ongan bo'lsa ham — to'liq rerun yangi intervalni o'rnatadi
+        st.rerun(scope="app")
+
+    state._deadline_armed = False
+    deadline_watch()